@@ -1,27 +1,71 @@
 import os
 import sys
-import pkgutil
-import inspect
-import importlib
+import time
+import atexit
+import itertools
+import queue
+from contextlib import nullcontext, redirect_stdout
 from dotenv import load_dotenv
 import logging
 import logging.config
-from app.commands import Command, CommandHandler
-from app.plugins.history import HistoryCommand
+from logging.handlers import QueueHandler, QueueListener
+from app.cache import ResultCache
+from app.commands import CommandHandler
+from app.history_store import HISTORY_FILE, HistoryEntry, HistoryStore
+from app.metrics import METRICS_FILE, Metrics, MetricsDumper
+from app.numeric import NumericMode
+from app.pipeline import Pipeline, iter_commands, iter_lines, stdin_is_pipelined
+from app.registry import PLUGIN_CACHE_FILE, PLUGINS_PACKAGE, LazyCommand, PluginRegistry
+
+def parse_bool(value):
+    """Interpret common truthy strings from the environment."""
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread."""
+
+    def prepare(self, record):
+        # The queue never leaves this process, so the record (args included) can be
+        # passed as-is instead of being formatted on the caller's thread
+        return record
 
 class App:
-    def __init__(self):
-        self.command_handler = CommandHandler()  # Initialize the CommandHandler to manage commands
-        self.configure_logging()
-        load_dotenv()
-        self.settings = self.load_environment_variables()
-        self.settings.setdefault('ENVIRONMENT', 'DEVELOPMENT')
-        
-        # Register the history command
-        self.command_handler.register_command("history", HistoryCommand(self.command_handler))
+    log_listener = None  # Background thread draining the log queue when LOG_MODE=queue
+    queued_loggers = []  # (logger, original handlers) pairs routed through the queue
+
+    def __init__(self, profile=None):
+        self.profile = profile  # StartupProfile timing each phase below (--profile-startup)
+        self.batch_errors = 0  # Lines that failed in the last run_batch
+        with self.phase("env"):
+            load_dotenv()
+            self.settings = self.load_environment_variables()
+            self.settings.setdefault('ENVIRONMENT', 'DEVELOPMENT')
+        with self.phase("logging"):
+            self.configure_logging()  # After settings, so LOG_MODE can come from .env
+        logging.info("Environment variables loaded.")
+
+        # Initialize the CommandHandler to manage commands
+        with self.phase("numeric"):
+            self.numeric = self.create_numeric_mode()
+            self.numeric.activate()  # Installs the Decimal context once, for the whole session
+        with self.phase("history"):
+            history_store = self.create_history_store()
+        with self.phase("handler"):
+            self.command_handler = CommandHandler(history_store, self.create_result_cache(),
+                                                  self.create_metrics(), self.numeric)
+            self.metrics_dumper = self.create_metrics_dumper()
+
+            # Register the history command; the plugin is imported on first use
+            self.command_handler.register_command("history", LazyCommand(
+                "app.plugins.history", "HistoryCommand", self.command_handler, needs_handler=True))
+
+    def phase(self, name):
+        """Time a start-up phase when profiling, otherwise do nothing."""
+        return nullcontext() if self.profile is None else self.profile.phase(name)
 
     def configure_logging(self):
         """Configure logging settings."""
+        App.stop_log_listener()  # fileConfig replaces the handlers a previous listener uses
         log_directory = 'logs'
         log_file_path = os.path.join(log_directory, 'app.log')
 
@@ -34,49 +78,306 @@ class App:
         else:
             logging.basicConfig(level=logging.INFO, filename=log_file_path, 
                                 format='%(asctime)s - %(levelname)s - %(message)s') #pragma: no cover
+        if self.get_setting('LOG_MODE', 'sync') == 'queue':
+            App.start_log_listener()
         logging.info("Logging configured.")
 
+    @classmethod
+    def start_log_listener(cls, logger_names=('', 'app')):
+        """
+        Put the configured handlers behind a queue drained by a background thread.
+
+        Callers only enqueue the record; the file and console writes happen on the
+        listener thread, which is flushed by stop_log_listener on exit.
+        """
+        cls.stop_log_listener()
+        loggers = [logging.getLogger(name) for name in logger_names]
+        handlers = []
+        for logger in loggers:
+            handlers.extend(handler for handler in logger.handlers if handler not in handlers)
+        log_queue = queue.SimpleQueue()
+        queue_handler = DeferredQueueHandler(log_queue)
+        cls.queued_loggers = [(logger, logger.handlers) for logger in loggers]
+        for logger in loggers:
+            logger.handlers = [queue_handler]
+        cls.log_listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        cls.log_listener.start()
+        atexit.register(cls.stop_log_listener)
+
+    @classmethod
+    def stop_log_listener(cls):
+        """Write out every queued record, stop the listener thread and restore the handlers."""
+        if cls.log_listener is None:
+            return
+        cls.log_listener.stop()
+        cls.log_listener = None
+        for logger, handlers in cls.queued_loggers:
+            logger.handlers = handlers
+        cls.queued_loggers = []
+
     def load_environment_variables(self):
         """Load environment variables from .env file."""
         settings = {key: value for key, value in os.environ.items()}
-        logging.info("Environment variables loaded.")
         return settings
 
-    def load_plugins(self): #pragma: no cover
-        """Dynamically load all plugins from the 'app.plugins' directory."""
-        plugins_package = 'app.plugins'
-        plugins_path = plugins_package.replace('.', '/')
-        if not os.path.exists(plugins_path): 
+    def get_setting(self, key, default, cast=str):
+        """Read a setting with a fallback default, converting it with cast."""
+        value = self.settings.get(key)
+        if value is None or value == '':
+            return default
+        try:
+            return cast(value)
+        except ValueError:
+            logging.warning(f"Invalid value for {key}: {value!r}. Using {default!r}.")
+            return default
+
+    def create_numeric_mode(self):
+        """Build the numeric mode (float, decimal or fraction) from settings."""
+        return NumericMode(self.get_setting('NUMERIC_MODE', 'float'),
+                           self.get_setting('DECIMAL_PRECISION', 28, int),
+                           self.get_setting('DECIMAL_ROUNDING', 'ROUND_HALF_EVEN'))
+
+    def create_history_store(self):
+        """Build the history store using the format, flush and compaction policy from settings."""
+        options = {
+            'flush_policy': self.get_setting('HISTORY_FLUSH_POLICY', 'write'),
+            'flush_every': self.get_setting('HISTORY_FLUSH_EVERY', 100, int),
+            'fsync': self.get_setting('HISTORY_FSYNC', False, parse_bool),
+            'compact_threshold': self.get_setting('HISTORY_COMPACT_THRESHOLD', 1000, int),
+            'locking': self.get_setting('HISTORY_LOCKING', True, parse_bool),
+        }
+        csv_path = self.get_setting('HISTORY_FILE', HISTORY_FILE)
+        if self.get_setting('HISTORY_FORMAT', 'csv') != 'binary':
+            # Values are read back as the mode's type, so Decimal and Fraction results stay exact
+            return HistoryStore(csv_path, number=self.numeric.number, **options, **self.history_retention())
+        if not self.numeric.is_float:
+            raise ValueError(f"HISTORY_FORMAT=binary stores float64 values and cannot be used "
+                             f"with NUMERIC_MODE={self.numeric.name}")
+
+        # numpy is only imported when the binary format is selected
+        from app.history_store.binary import BINARY_HISTORY_FILE, BinaryHistoryStore, csv_to_binary
+        binary_path = self.get_setting('HISTORY_BINARY_FILE', BINARY_HISTORY_FILE)
+        if not os.path.exists(binary_path) and os.path.exists(csv_path):
+            rows = csv_to_binary(csv_path, binary_path)
+            logging.info(f"Imported {rows} history rows from {csv_path} into {binary_path}.")
+        return BinaryHistoryStore(binary_path, **options, **self.history_retention())
+
+    def history_retention(self):
+        """Rotation limits of the active history segment from settings (0 turns a limit off)."""
+        return {
+            'max_rows': self.get_setting('HISTORY_MAX_ROWS', 0, int),
+            'max_bytes': self.get_setting('HISTORY_MAX_BYTES', 0, int),
+            'rotate_interval': self.get_setting('HISTORY_ROTATE_INTERVAL', 0.0, float),
+            'archive_keep': self.get_setting('HISTORY_ARCHIVE_KEEP', 0, int),
+        }
+
+    def create_result_cache(self):
+        """Build the result cache for pure commands, or None when CACHE_ENABLED is off."""
+        if not self.get_setting('CACHE_ENABLED', True, parse_bool):
+            return None
+        return ResultCache(self.get_setting('CACHE_SIZE', 1024, int), self.get_setting('CACHE_POLICY', 'lru'))
+
+    def create_metrics(self):
+        """Build the command metrics shown by 'stats', sampling latencies as configured."""
+        return Metrics(self.get_setting('METRICS_ENABLED', True, parse_bool),
+                       max(self.get_setting('METRICS_SAMPLE_EVERY', 10, int), 1))
+
+    def create_metrics_dumper(self):
+        """Start dumping metrics to a file every METRICS_DUMP_INTERVAL seconds (0 turns it off)."""
+        interval = self.get_setting('METRICS_DUMP_INTERVAL', 0.0, float)
+        if interval <= 0 or not self.command_handler.metrics.enabled:
+            return None
+        path = self.get_setting('METRICS_FILE', METRICS_FILE)
+        logging.info(f"Dumping metrics to {path} every {interval:g} s.")
+        return MetricsDumper(self.command_handler.metrics, path, interval).start()
+
+    def shutdown(self):
+        """Flush buffered state before the application exits."""
+        self.command_handler.close()
+        if self.metrics_dumper is not None:
+            self.metrics_dumper.stop()  # Writes a final snapshot
+        if self.command_handler.result_cache is not None:
+            stats = self.command_handler.result_cache.stats()
+            logging.info(f"Result cache: {stats['hits']} hits, {stats['misses']} misses.")
+        logging.info("Application exit.")
+        App.stop_log_listener()
+
+    def load_plugins(self):
+        """Register every plugin command; plugins are imported on first use."""
+        plugins_path = PLUGINS_PACKAGE.replace('.', '/')
+        if not os.path.exists(plugins_path): #pragma: no cover
             logging.warning(f"Plugins directory '{plugins_path}' not found.")
             return
-        for _, plugin_name, is_pkg in pkgutil.iter_modules([plugins_path]):
-            if is_pkg:
-                try:
-                    plugin_module = importlib.import_module(f'{plugins_package}.{plugin_name}')
-                    self.register_plugin_commands(plugin_module, plugin_name)
-                except ImportError as e:
-                    logging.error(f"Error importing plugin {plugin_name}: {e}")
-
-
-    def register_plugin_commands(self, plugin_module, plugin_name):
-        """Register command classes from the plugin module."""
-        for item_name in dir(plugin_module):
-            item = getattr(plugin_module, item_name)
-            if isinstance(item, type) and issubclass(item, Command) and item is not Command:
-                # Use inspect to check if 'command_handler' is in the constructor
-                init_signature = inspect.signature(item.__init__)
-                if 'command_handler' in init_signature.parameters:
-                    # Pass self.command_handler if 'command_handler' is an expected argument
-                    self.command_handler.register_command(plugin_name, item(self.command_handler))
+        started = time.perf_counter()
+        with self.phase("plugins"):
+            registry = PluginRegistry(plugins_path, cache_file=self.get_setting('PLUGIN_CACHE_FILE', PLUGIN_CACHE_FILE))
+            registry.register(self.command_handler)
+        logging.info(f"Plugins registered in {(time.perf_counter() - started) * 1000:.1f} ms.")
+
+    def import_plugins(self):
+        """Import every plugin that is still deferred, timing each one as its own phase."""
+        for name, command in sorted(self.command_handler.commands.items()):
+            if isinstance(command, LazyCommand) and not command.loaded:
+                with self.phase(f"plugin {name}"):
+                    command.load()
+
+    def run_batch(self, lines, output=None, workers=None):
+        """
+        Run commands from an iterable of lines without the interactive REPL.
+
+        Each arithmetic result is written to output as one line, and the history
+        rows of the whole batch are flushed together. With more than one worker
+        (PARALLEL_WORKERS), two-operand arithmetic is evaluated on a worker pool
+        and merged back in input order. Returns the number of lines that failed.
+        """
+        output = output or sys.stdout
+        self.load_plugins()
+        handler = self.command_handler
+        if workers is None:
+            workers = self.get_setting('PARALLEL_WORKERS', 1, int)
+        if workers > 1 and not self.numeric.is_float:
+            logging.info(f"Parallel evaluation uses float64; running sequentially in {self.numeric.name} mode.")
+            workers = 1
+        executor = self.create_parallel_executor(workers) if workers > 1 else None
+        self.batch_errors = 0
+        processed = 0
+
+        try:
+            with handler.history_store.batch():
+                commands = self.iter_batch_commands(lines)
+                if executor is None:
+                    for line_number, tokens in commands:
+                        processed += 1
+                        self.run_batch_command(line_number, tokens, output)
                 else:
-                    # Otherwise, initialize without arguments
-                    self.command_handler.register_command(plugin_name, item())
-                logging.info(f"Command '{plugin_name}' from plugin '{plugin_name}' registered.")
+                    window = executor.chunk_size * executor.workers
+                    while True:
+                        # Bounded windows keep memory flat for very large inputs
+                        block = list(itertools.islice(commands, window))
+                        if not block:
+                            break
+                        processed += len(block)
+                        self.run_parallel_block(executor, block, output)
+        finally:
+            if executor is not None:
+                executor.close()
+
+        logging.info(f"Batch finished: {processed} commands, {self.batch_errors} errors.")
+        return self.batch_errors
 
+    def iter_batch_commands(self, lines):
+        """Yield (line number, tokens) for each command line, stopping at 'exit'."""
+        for line_number, line in enumerate(lines, start=1):
+            tokens = line.split()
+            if not tokens or tokens[0].startswith('#'):
+                continue  # Skip blank lines and comments
+            if tokens[0] == 'exit':
+                return
+            yield line_number, tokens
 
+    def run_batch_command(self, line_number, tokens, output):
+        """Run one batch command in this process, writing its result or error."""
+        command_name = tokens[0]
+        handler = self.command_handler
+        try:
+            command = handler.commands[command_name]
+            if hasattr(command, 'evaluate'):
+                output.write(f"{handler.evaluate_command(command_name, *tokens[1:])}\n")
+            else:
+                # Commands such as 'history show' print their own output
+                with redirect_stdout(output):
+                    command.execute(*tokens[1:])
+        except KeyError:
+            self.batch_errors += 1
+            output.write(f"Error on line {line_number}: Unknown command: {command_name}\n")
+        except Exception as e:
+            self.batch_errors += 1
+            output.write(f"Error on line {line_number}: {e}\n")
+
+    def run_parallel_block(self, executor, block, output):
+        """Evaluate the two-operand arithmetic of a block in parallel, then merge in order."""
+        rows = [(tokens[0], tokens[1], tokens[2]) for _, tokens in block
+                if tokens[0] in executor.operations and len(tokens) == 3]
+        results = iter(executor.evaluate(rows))
+        add = self.command_handler.history_store.add
+        operations = executor.operations
+        lines = []  # Results written together, or before any command that prints
+        for line_number, tokens in block:
+            if tokens[0] in operations and len(tokens) == 3:
+                ok, entry = next(results)
+                if ok:
+                    # The worker parsed and evaluated the row; it only has to be recorded
+                    add(HistoryEntry(entry))
+                    lines.append(f"{entry[3]}\n")
+                    continue
+            output.write("".join(lines))
+            lines.clear()
+            # Other commands run here, in order, so they see every earlier result. Failures
+            # are re-run here so they are reported and counted (e.g. in 'history stats')
+            # exactly like sequential ones
+            self.run_batch_command(line_number, tokens, output)
+        output.write("".join(lines))
+
+    def create_parallel_executor(self, workers):
+        """Build a worker pool for the pure arithmetic commands using settings."""
+        # concurrent.futures is only imported when a batch runs on workers
+        from app.parallel import ParallelExecutor, operations_for
+        return ParallelExecutor(
+            operations_for(self.command_handler.commands),
+            workers,
+            backend=self.get_setting('PARALLEL_BACKEND', 'process'),
+            chunk_size=self.get_setting('PARALLEL_CHUNK_SIZE', 50000, int),
+        )
+
+    def create_server(self, host=None, port=None, path=None):
+        """Build the command server, filling in the address from settings."""
+        # asyncio is only imported when serving (it is about half of a cold start)
+        from app.server import SERVER_HOST, SERVER_PORT, CommandServer
+        return CommandServer(
+            self.command_handler,
+            host or self.get_setting('SERVER_HOST', SERVER_HOST),
+            port if port is not None else self.get_setting('SERVER_PORT', SERVER_PORT, int),
+            path or self.get_setting('SERVER_SOCKET', None),
+        )
+
+    def serve(self, host=None, port=None, path=None): #pragma: no cover
+        """Serve commands to socket clients from this process until interrupted."""
+        import asyncio
+        self.load_plugins()
+        server = self.create_server(host, port, path)
+        try:
+            asyncio.run(server.serve_forever())
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            pass
+        finally:
+            self.shutdown()
+        return 0
+
+    def run_pipe(self, stream, output=None):
+        """
+        Run REPL commands from piped input, printing what the REPL would print.
+
+        Input is read in large chunks and split on any whitespace, each command is
+        bound to a runner on first use, and output is written in blocks.
+        Returns the number of commands run.
+        """
+        output = output or sys.stdout
+        self.load_plugins()
+        started = time.perf_counter()
+        pipeline = Pipeline(self.command_handler, output)
+        count = pipeline.run(iter_commands(iter_lines(stream)))
+        output.flush()
+        logging.info(f"Pipelined {count} commands in {time.perf_counter() - started:.2f} s.")
+        return count
 
     def start(self): #pragma: no cover
         """Start the REPL for command input."""
+        if stdin_is_pipelined():
+            # Piped or redirected input: no prompts, buffered reads and writes
+            self.run_pipe(sys.stdin)
+            self.shutdown()
+            sys.exit(0)
+
         self.load_plugins()
         logging.info("Application started.")
         logging.info("Type 'menu' to see commands.")
@@ -84,11 +385,13 @@ class App:
         logging.info("Type 'history show' to see history.")
         
         while True:  # REPL (Read, Evaluate, Print, Loop)
-            user_input = input(">>> ").strip().split(" ")
+            user_input = input(">>> ").split()  # Any run of whitespace separates arguments
+            if not user_input:
+                continue
             command_name = user_input[0]
             
             if command_name == 'exit':
-                logging.info("Application exit.")
+                self.shutdown()
                 sys.exit(0)  # Use sys.exit(0) for a clean exit, indicating success.
             
             # Run the specified command with provided arguments
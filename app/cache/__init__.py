@@ -0,0 +1,102 @@
+from collections import OrderedDict, defaultdict
+
+CACHE_POLICIES = ("lru", "lfu")
+MISSING = object()  # Returned by get() when a key is not cached
+
+def result_key(command_name, args):
+    """
+    Cache key for a command and its operands.
+
+    Operands are keyed by repr, because values that compare equal can still give
+    different results or print differently: -0.0 and 0.0, Decimal('1.0') and Decimal('1.00').
+    """
+    return (command_name, *map(repr, args))
+
+class ResultCache:
+    """Size-bounded cache of command results with LRU or LFU eviction and hit/miss counters."""
+
+    def __init__(self, max_size: int = 1024, policy: str = "lru"):
+        if policy not in CACHE_POLICIES:
+            raise ValueError(f"Unknown cache policy: {policy}")
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.policy = policy
+        self.hits = 0
+        self.misses = 0
+        self.clear()
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, key):
+        return key in self._values
+
+    def get(self, key, default=MISSING):
+        """Return the cached value for key, counting a hit or a miss."""
+        if key not in self._values:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._touch(key)
+        return self._values[key]
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently or least frequently used key when full."""
+        if key in self._values:
+            self._values[key] = value
+            self._touch(key)
+            return
+        if len(self._values) >= self.max_size:
+            self._evict()
+        self._values[key] = value
+        if self.policy == "lfu":
+            self._counts[key] = 1
+            self._buckets[1][key] = None
+            self._min_count = 1
+
+    def clear(self):
+        """Drop every cached value (the hit and miss counters are kept)."""
+        self._values = OrderedDict()
+        # LFU bookkeeping: use count per key and keys per count, oldest first
+        self._counts = {}
+        self._buckets = defaultdict(OrderedDict)
+        self._min_count = 0
+
+    def stats(self):
+        """Return the counters as a dictionary."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self),
+            "max_size": self.max_size,
+            "policy": self.policy,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _touch(self, key):
+        """Record a use of key for the eviction policy."""
+        if self.policy == "lru":
+            self._values.move_to_end(key)
+            return
+        count = self._counts[key]
+        del self._buckets[count][key]
+        if not self._buckets[count]:
+            del self._buckets[count]
+            if self._min_count == count:
+                self._min_count = count + 1
+        self._counts[key] = count + 1
+        self._buckets[count + 1][key] = None
+
+    def _evict(self):
+        """Remove one key according to the eviction policy."""
+        if self.policy == "lru":
+            self._values.popitem(last=False)
+            return
+        bucket = self._buckets[self._min_count]
+        key, _ = bucket.popitem(last=False)
+        if not bucket:
+            del self._buckets[self._min_count]
+        del self._counts[key]
+        del self._values[key]
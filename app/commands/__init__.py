@@ -1,11 +1,14 @@
-import csv
-import os
 from abc import ABC, abstractmethod
-
-HISTORY_FILE = "data/history.csv"  # Ensure the correct path
+from app.cache import MISSING, ResultCache, result_key
+from app.history_store import HISTORY_FILE, HistoryStore, history_key
+from app.metrics import Metrics
+from app.numeric import NumericMode
 
 # Define Command (Abstract Base Class)
 class Command(ABC): #pragma: no cover
+    pure = False  # Pure commands declare that their results may be cached
+    takes_numbers = True  # CommandHandler converts the arguments to numbers (see NumericMode) first
+
     @abstractmethod
     def execute(self, *args, **kwargs):
         """Abstract method to execute the command with given arguments."""
@@ -13,12 +16,24 @@ class Command(ABC): #pragma: no cover
 
 # Define CommandHandler
 class CommandHandler:
-    def __init__(self):
+    def __init__(self, history_store: HistoryStore = None, result_cache: ResultCache = None,
+                 metrics: Metrics = None, numeric: NumericMode = None):
         self.commands = {}  # Dictionary to store command classes
-        self.history = self.load_history()  # Load existing history to prevent duplicates
+        self.result_cache = result_cache  # None turns result caching off
+        self.metrics = metrics if metrics is not None else Metrics()  # Shown by the 'stats' command
+        self.numeric = numeric if numeric is not None else NumericMode()  # float, Decimal or Fraction
+        # The history store loads existing history and owns the only copy in memory
+        self.history_store = history_store if history_store is not None else HistoryStore(HISTORY_FILE)
+
+    @property
+    def history(self):
+        """Live (not deleted) history entries held in memory by the history store."""
+        return list(self.history_store)
 
-        # Ensure 'data' directory exists
-        os.makedirs(os.path.dirname(HISTORY_FILE), exist_ok=True)
+    @property
+    def history_index(self):
+        """Keys of the history entries used for constant-time duplicate checks."""
+        return self.history_store.index
 
     def register_command(self, command_name: str, command):
         """Registers a command with its corresponding name."""
@@ -32,55 +47,140 @@ class CommandHandler:
             command_name (str): The name of the command (e.g., 'add', 'subtract').
             *args: The extra arguments for the command (e.g., numbers a and b).
         """
+        metrics = self.metrics
+        started = mark = metrics.start()  # 0 unless this command is sampled for timing
+        error = True
         try:
-            # Handle special commands like 'menu' and 'history'
-            if command_name in ["history", "menu"]:
-                if command_name in self.commands:
-                    self.commands[command_name].execute(*args)
-                else:
-                    print(f"No such command: {command_name}")
+            command = self.commands[command_name]
+
+            # Handle commands that parse their own arguments, like 'menu', 'history' and 'expr'
+            if not command.takes_numbers:
+                command.execute(*args)
+                error = False
                 return
 
-            # Convert all arguments to floats for consistency
-            args = [float(arg) for arg in args]
+            # Convert all arguments with the numeric mode (the float builtin by default)
+            parse = self.numeric.parse
+            args = [parse(arg) for arg in args]
+            if mark:
+                mark = metrics.phase(command_name, "parse", mark)
 
-            # Execute the command and store the result
-            result = float(self.commands[command_name].execute(*args))
+            # More than two operands are reduced in one pass, e.g. 'add 1 2 3'
+            if len(args) > 2:
+                result = self.evaluate_command(command_name, *args)
+                if mark:
+                    metrics.phase(command_name, "execute", mark)
+                print(f" {command.symbol} ".join(map(str, args)) + f" = {result}")
+                error = False
+                return
 
-            # Create a formatted command entry
-            command_entry = [command_name, *args, result]
+            # Execute the command (or reuse a cached result) and store the result
+            result = self.cached_result(command_name, command, args)
+            if result is MISSING:
+                try:
+                    result = parse(command.execute(*args))
+                except ZeroDivisionError:
+                    self.history_store.stats.record_zero_division()
+                    raise
+                self.cache_result(command_name, command, args, result)
+            else:
+                print(f"{args[0]} {command.symbol} {args[1]} = {result}")
+            if mark:
+                mark = metrics.phase(command_name, "execute", mark)
 
-            # Prevent duplicate storage in memory (history)
-            if command_entry not in self.history:
-                self.history.append(command_entry)  # Append only if unique
-                self.save_history()  # Save updated history to CSV
+            # Record the entry once; duplicates are skipped by the history store
+            entry = [command_name, *args, result]
+            if self.history_store.remember(entry):
+                if mark:
+                    mark = metrics.phase(command_name, "dedup", mark)
+                self.history_store.append(entry)
+                if mark:
+                    metrics.phase(command_name, "save", mark)
+            elif mark:
+                metrics.phase(command_name, "dedup", mark)
+            error = False
 
         except KeyError:
             print(f"No such command: {command_name}")
+            command_name = "unknown"  # Count unknown names together so the table stays bounded
         except ValueError:
             print("Enter valid numbers for the operation.")
         except Exception as e:
             print(f"Error executing command '{command_name}': {e}")
+        finally:
+            metrics.finish(command_name, started, error)
 
-    def load_history(self):
-        """Load history from CSV file into memory to prevent duplicate storage."""
-        history_data = []
-        if os.path.exists(HISTORY_FILE):
+    def evaluate_command(self, command_name: str, *args):
+        """
+        Evaluate an arithmetic command without printing or logging and record it.
+
+        More than two operands are reduced left to right, one history row per step.
+        Used by batch mode and expressions. Raises KeyError for unknown commands and ValueError
+        for arguments that are not numbers.
+        """
+        command = self.commands[command_name]
+        parse = self.numeric.parse
+        args = [parse(arg) for arg in args]
+        if len(args) > 2:
+            # Reduce variadic operands left to right, recording each step in one history write
+            with self.history_store.batch():
+                result = args[0]
+                for operand in args[1:]:
+                    result = self.evaluate_command(command_name, result, operand)
+            return result
+
+        result = self.cached_result(command_name, command, args)
+        if result is MISSING:
             try:
-                with open(HISTORY_FILE, mode="r", newline="") as file:
-                    reader = csv.reader(file)
-                    next(reader, None)  # Skip header
-                    for row in reader:
-                        # Convert numerical values back to float for proper comparison
-                        history_data.append([row[0], float(row[1]), float(row[2]), float(row[3])])
-            except Exception as e:
-                print(f"Error loading history: {e}")
-        return history_data
-
-    def save_history(self): # pragma: no cover
-        """Save the complete history list to CSV, ensuring no duplicate entries."""
-        with open(HISTORY_FILE, mode="w", newline="") as file:  # Overwrite to prevent duplicates
-            writer = csv.writer(file)
-            writer.writerow(["Operation", "Operand 1", "Operand 2", "Result"])  # Write header
-            for entry in self.history:
-                writer.writerow(entry)  # Store only unique values
+                result = parse(command.evaluate(*args))
+            except ZeroDivisionError:
+                self.history_store.stats.record_zero_division()  # Shown by 'history stats'
+                raise
+            self.cache_result(command_name, command, args, result)
+        self.add_history_entry([command_name, *args, result])
+        return result
+
+    def cached_result(self, command_name: str, command, args):
+        """Return the cached result for a pure command, or MISSING."""
+        if self.result_cache is None or not command.pure:
+            return MISSING
+        return self.result_cache.get(result_key(command_name, args))
+
+    def cache_result(self, command_name: str, command, args, result):
+        """Remember the result of a pure command."""
+        if self.result_cache is not None and command.pure:
+            self.result_cache.put(result_key(command_name, args), result)
+
+    def evaluate_many(self, command_name: str, a, b, **kwargs):
+        """
+        Evaluate an arithmetic command over whole arrays of operands in one call.
+
+        Results are returned as a numpy array and are not recorded in history.
+        Extra keyword arguments (such as DivideCommand's on_zero) go to the plugin.
+        """
+        return self.commands[command_name].evaluate_many(a, b, **kwargs)
+
+    def load_history(self):
+        """Reload history from CSV file into memory to prevent duplicate storage."""
+        self.history_store.reload()
+        return self.history
+
+    def add_history_entry(self, entry):
+        """Record an entry in memory and on disk, returning False if it is a duplicate."""
+        return self.history_store.add(entry)
+
+    def delete_history_entry(self, position):
+        """Delete the entry at a 0-based row position, returning the removed entry."""
+        return self.history_store.delete(position)
+
+    def clear_history(self):
+        """Forget all history entries, in memory and on disk."""
+        self.history_store.clear()
+
+    def save_history(self):
+        """Rewrite the complete history list to CSV (appends go through the history store)."""
+        self.history_store.rewrite()
+
+    def close(self):
+        """Flush buffered history rows before the application exits."""
+        self.history_store.close()
@@ -0,0 +1,95 @@
+import re
+from functools import lru_cache
+
+# Operator symbols mapped to the plugin command that evaluates them
+OPERATORS = {"+": "add", "-": "subtract", "*": "multiply", "x": "multiply", "/": "divide"}
+TOKEN_PATTERN = re.compile(r"\s*(?:(\d+\.?\d*(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?)|(.))")
+
+def tokenize(source: str, number=float):
+    """Split an expression into number and symbol tokens, converting numbers with number()."""
+    tokens = []
+    for text, symbol in TOKEN_PATTERN.findall(source.strip()):
+        if text:
+            tokens.append(number(text))
+        elif symbol in OPERATORS or symbol in "()":
+            tokens.append(symbol)
+        elif not symbol.isspace():
+            raise ValueError(f"Invalid expression: unexpected '{symbol}'")
+    return tokens
+
+class Parser:
+    """Recursive-descent parser that compiles tokens into postfix instructions."""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+        self.code = []
+
+    def parse(self):
+        if not self.tokens:
+            raise ValueError("Invalid expression: nothing to evaluate")
+        self.expression()
+        if self.position < len(self.tokens):
+            raise ValueError(f"Invalid expression: unexpected '{self.tokens[self.position]}'")
+        return tuple(self.code)
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def take(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def expression(self):
+        self.term()
+        while self.peek() in ("+", "-"):
+            operator = self.take()
+            self.term()
+            self.code.append(("apply", OPERATORS[operator]))
+
+    def term(self):
+        self.factor()
+        while self.peek() in ("*", "x", "/"):
+            operator = self.take()
+            self.factor()
+            self.code.append(("apply", OPERATORS[operator]))
+
+    def factor(self):
+        token = self.take()
+        if token in ("+", "-"):
+            self.factor()
+            if token == "-":
+                self.code.append(("negate",))
+        elif token == "(":
+            self.expression()
+            if self.take() != ")":
+                raise ValueError("Invalid expression: missing ')'")
+        elif token is not None and not isinstance(token, str):
+            self.code.append(("push", token))  # A number: float, Decimal or Fraction
+        else:
+            raise ValueError("Invalid expression: expected a number")
+
+@lru_cache(maxsize=256)
+def compile_expression(source: str, number=float):
+    """Compile an expression into postfix instructions; results are cached by source text."""
+    return Parser(tokenize(source, number)).parse()
+
+def evaluate_code(code, apply):
+    """
+    Run compiled instructions on a stack.
+
+    apply(command_name, a, b) performs each binary operation, so the calculation goes
+    through the same plugin evaluate functions (and history) as a typed command.
+    """
+    stack = []
+    for instruction in code:
+        if instruction[0] == "push":
+            stack.append(instruction[1])
+        elif instruction[0] == "negate":
+            stack.append(-stack.pop())
+        else:
+            b = stack.pop()
+            a = stack.pop()
+            stack.append(apply(instruction[1], a, b))
+    return stack[0]
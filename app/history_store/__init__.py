@@ -0,0 +1,739 @@
+import atexit
+import collections
+import csv
+import glob
+import gzip
+import itertools
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from decimal import Decimal
+from app.history_store.stats import HistoryStats
+from app.numeric import convert_number
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no flock; history is then single-instance
+    fcntl = None
+
+HISTORY_FILE = "data/history.csv"  # Ensure the correct path
+HISTORY_HEADER = ["Operation", "Operand 1", "Operand 2", "Result"]
+
+# Flush after every row, after every N rows, or only when the store is closed
+FLUSH_POLICIES = ("write", "every_n", "exit")
+ARCHIVE_COMPRESSLEVEL = 6  # gzip level for archived segments; 9 is much slower for little gain
+
+class HistoryEntry(tuple):
+    """
+    One calculation as an immutable (operation, a, b, result) record.
+
+    The store keeps a single HistoryEntry per calculation and uses the same object
+    as its duplicate-check key, instead of a list plus a separate key tuple. It has
+    no per-instance __dict__, and it compares equal to [operation, a, b, result]
+    lists, so callers can keep treating entries as lists.
+    """
+
+    __slots__ = ()
+    __hash__ = tuple.__hash__  # Same hash as the plain key tuple, so either finds the other
+
+    def __eq__(self, other):
+        if isinstance(other, list):
+            other = tuple(other)
+        return tuple.__eq__(self, other)
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+def history_key(entry, number=float):
+    """Normalize an [operation, a, b, result] entry into a hashable HistoryEntry."""
+    return HistoryEntry((entry[0], number(entry[1]), number(entry[2]), number(entry[3])))
+
+def is_header(row):
+    """Whether a CSV row is empty or a header row, including the older "Operand1" spelling."""
+    return not row or row[0] == HISTORY_HEADER[0]
+
+def exact_key(entry):
+    """
+    Duplicate-check key that keeps each value's exact text.
+
+    Decimals that compare equal can be written differently (2.0 and 2.00); they are
+    different calculations, so the Decimal mode keys its entries by text.
+    """
+    return (entry[0], str(entry[1]), str(entry[2]), str(entry[3]))
+
+def parse_row(row, number=float):
+    """Convert a CSV row to a HistoryEntry, or None for headers and bad rows."""
+    if is_header(row):
+        return None
+    try:
+        # Convert numerical values back with the store's number type (float, Decimal or Fraction);
+        # operation names are interned so a large history holds one copy of each
+        return HistoryEntry((sys.intern(row[0]), number(row[1]), number(row[2]), number(row[3])))
+    except (IndexError, ValueError, ArithmeticError):
+        pass
+    try:
+        # Slow path for rows another numeric mode wrote, e.g. '1/3' from the fraction mode
+        return HistoryEntry((sys.intern(row[0]), convert_number(row[1], number),
+                             convert_number(row[2], number), convert_number(row[3], number)))
+    except (IndexError, ValueError, ArithmeticError):
+        logging.warning(f"Skipping malformed history row: {row}")
+        return None
+
+class HistoryStore:
+    """
+    Single owner of the calculation history: the CSV file and its in-memory view.
+
+    With locking on, several processes can share one history file. Every write
+    holds an exclusive flock on a sidecar .lock file, rewrites go to a temporary
+    file that is renamed over the old one, and before writing (or with refresh())
+    the store reads only the rows and deletes other processes added since it last looked.
+
+    The file is the active segment of the history. When it reaches max_rows or
+    max_bytes, or when a write falls in a new rotate_interval window (in seconds),
+    its rows are moved to a gzip archive next to it and a new segment starts, so
+    only the active segment is loaded. archive_keep limits how many archives are
+    kept. Archives are only read when asked for (see iter_rows and tail).
+    """
+
+    def __init__(self, path: str = HISTORY_FILE, flush_policy: str = "write",
+                 flush_every: int = 100, fsync: bool = False, compact_threshold: int = 1000,
+                 locking: bool = True, number=float, max_rows: int = 0, max_bytes: int = 0,
+                 rotate_interval: float = 0, archive_keep: int = 0):
+        if flush_policy not in FLUSH_POLICIES:
+            raise ValueError(f"Unknown flush policy: {flush_policy}")
+        if flush_every < 1:
+            raise ValueError("flush_every must be at least 1")
+        if compact_threshold < 1:
+            raise ValueError("compact_threshold must be at least 1")
+        if min(max_rows, max_bytes, rotate_interval, archive_keep) < 0:
+            raise ValueError("Retention limits must not be negative (0 turns a limit off)")
+
+        self.path = path
+        self.tombstone_path = path + ".deleted"  # Sidecar log of deleted row positions
+        self.lock_path = path + ".lock"  # Never replaced, so every process locks the same file
+        self.stats_path = path + ".stats"  # Aggregates saved at close, see HistoryStats
+        self.number = number  # Type values are read back as; Decimal and Fraction keep them exact
+        self.exact_keys = number is Decimal  # Index keys hold text (see exact_key); otherwise the records
+        self.compact_threshold = compact_threshold
+        self.flush_policy = flush_policy
+        self.flush_every = flush_every
+        self.fsync = fsync
+        self.locking = locking and fcntl is not None
+        self.max_rows = max_rows  # Retention limits of the active segment; 0 turns one off
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.archive_keep = archive_keep  # Number of archives kept; 0 keeps them all
+        self._file = None
+        self._writer = None
+        self._unflushed = []  # Entries added since the last flush, written when it happens
+        self._lock_file = None
+        self._lock_depth = 0  # Nesting level of _locked() blocks
+        self._seen = None  # Disk state the in-memory view matches, see _disk_state()
+        self._batch_depth = 0  # Nesting level of batch() blocks
+        self._batch_policy = flush_policy
+        self._closed = True  # No exit hook registered; see _register_close()
+        self.unreadable = []  # Rows no numeric mode can parse; kept on disk when the file is rewritten
+
+        # Ensure the history directory exists
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # In-memory view of the history and the keys used for duplicate checks.
+        # Deleted rows stay as None so positions match the rows on disk until compaction.
+        self.entries = []
+        self.index = set()
+        self.deleted = set()  # 0-based positions of tombstoned rows
+        self.stats = HistoryStats(number)  # Running aggregates shown by 'history stats'
+        # Before loading, so an oversized or outdated segment is never parsed
+        self._rotate_if_due(self._count_rows())
+        self.reload()
+        self._rotate_if_due()  # The row limit can only be checked once the rows are counted
+
+        # Buffered rows must reach the disk even when the app leaves through sys.exit
+        self._register_close()
+
+    def load(self):
+        """Load history rows from the CSV file as HistoryEntry records."""
+        try:
+            return list(self.iter_entries())
+        except OSError as e:
+            print(f"Error loading history: {e}")
+            return []
+
+    def iter_entries(self, unreadable=None):
+        """Stream history rows from the CSV file one at a time, collecting bad rows in unreadable."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, mode="r", newline="") as file:
+            for row in csv.reader(file):
+                entry = parse_row(row, self.number)
+                if entry is not None:
+                    yield entry
+                elif unreadable is not None and not is_header(row):
+                    unreadable.append(row)
+
+    def load_tombstones(self):
+        """Read the 0-based positions recorded in the tombstone log."""
+        deleted = set()
+        if os.path.exists(self.tombstone_path):
+            with open(self.tombstone_path, encoding="utf-8") as file:
+                deleted = {int(line) for line in file if line.strip().isdigit()}
+        return deleted
+
+    def reload(self):
+        """Rebuild the in-memory view from disk, applying tombstones and dropping duplicates."""
+        with self._locked():
+            self.entries = []
+            self.index = set()
+            self.deleted = self.load_tombstones()
+            self.unreadable = []
+            self._unflushed = []
+            self.stats.stale = True  # Not counted row by row; loaded below or rebuilt when needed
+            duplicates = 0
+            try:
+                # Streamed, so the file is never held as a list next to the records
+                for position, entry in enumerate(self.iter_entries(self.unreadable)):
+                    if position in self.deleted:
+                        self.entries.append(None)
+                    elif not self.remember(entry):
+                        duplicates += 1
+            except OSError as e:
+                print(f"Error loading history: {e}")
+            self._mark_seen()
+            self.stats.load(self.stats_path, self._disk_state())
+            if duplicates:
+                logging.info(f"Removed {duplicates} duplicate history rows.")
+            if duplicates or len(self.deleted) >= self.compact_threshold:
+                self.compact()
+
+    def refresh(self):
+        """Pick up rows and deletes that other processes wrote since this store last looked."""
+        if self.locking:
+            with self._locked():
+                self._catch_up()
+
+    def iter_rows(self, offset: int = 0, limit: int = None, operation: str = None, archived: bool = False):
+        """
+        Stream (1-based position, entry) pairs from disk, optionally filtered by operation.
+
+        With archived, rows of the archives come first, oldest archive first, with "-"
+        as their position (they cannot be deleted). Each archive is opened only
+        when the iteration reaches it.
+        """
+        self.refresh()
+        self.flush()
+        rows = ((position, entry) for position, entry in enumerate(self.iter_entries(), start=1)
+                if position - 1 not in self.deleted)
+        if archived:
+            rows = itertools.chain((("-", entry) for path in self.archive_paths()
+                                    for entry in self.iter_archive(path)), rows)
+        if operation is not None:
+            rows = ((position, entry) for position, entry in rows if entry[0] == operation)
+        return itertools.islice(rows, offset, None if limit is None else offset + limit)
+
+    def tail(self, count: int, operation: str = None, archived: bool = False):
+        """
+        Return the last count (position, entry) pairs, reading the file from its end.
+
+        With archived, rows missing from the active segment are taken from the
+        newest archives, which are read only when needed.
+        """
+        self.refresh()
+        self.flush()
+        rows = []
+        if count <= 0 or not os.path.exists(self.path):
+            return rows
+        distance = 0  # Entries seen so far, counting back from the last one
+        for line in self._reverse_lines():
+            entry = parse_row(next(csv.reader([line])), self.number)
+            if entry is None:
+                continue
+            distance += 1
+            position = len(self.entries) - distance + 1
+            if position - 1 in self.deleted:
+                continue
+            if operation is None or entry[0] == operation:
+                rows.append((position, entry))
+                if len(rows) == count:
+                    break
+        rows.reverse()
+        if archived:
+            rows[:0] = self.archived_tail(count - len(rows), operation)
+        return rows
+
+    def archived_tail(self, count: int, operation: str = None):
+        """Return the last count ("-", entry) pairs of the archives, newest archives read first."""
+        rows = []
+        for path in reversed(self.archive_paths()):
+            if len(rows) >= count:
+                break
+            entries = (entry for entry in self.iter_archive(path) if operation is None or entry[0] == operation)
+            rows[:0] = (("-", entry) for entry in collections.deque(entries, maxlen=count - len(rows)))
+        return rows
+
+    def archive_paths(self):
+        """Paths of the archived segments, oldest first."""
+        root, extension = os.path.splitext(self.path)
+        return sorted(glob.glob(f"{glob.escape(root)}.*{extension}.gz"))
+
+    def iter_archive(self, path):
+        """Stream the entries of one archived segment."""
+        try:
+            with gzip.open(path, mode="rt", newline="") as file:
+                for row in csv.reader(file):
+                    entry = parse_row(row, self.number)
+                    if entry is not None:
+                        yield entry
+        except (OSError, EOFError) as e:
+            logging.warning(f"Could not read history archive {path}: {e}")
+
+    def rotate(self):
+        """
+        Move the rows of the active segment into a new archive and start an empty segment.
+
+        Returns the number of rows archived. Entries not flushed yet go to the new segment.
+        """
+        with self._locked():
+            if self.locking:
+                self._catch_up()
+            return self._rotate()
+
+    def __len__(self):
+        return len(self.entries) - len(self.deleted)
+
+    def __iter__(self):
+        """Iterate over the live (not deleted) entries."""
+        return (entry for entry in self.entries if entry is not None)
+
+    def __contains__(self, entry):
+        return self._index_key(entry) in self.index
+
+    def add(self, entry):
+        """
+        Record a calculation once: in memory and as a single appended row.
+
+        A row another process wrote since the last refresh is only seen at the next
+        flush; the duplicate is then dropped instead of written.
+        """
+        if not self.remember(entry):
+            return False
+        self.append(entry)
+        return True
+
+    def delete(self, position):
+        """
+        Delete the entry at a 0-based position and return it.
+
+        The row is not removed from the file; its position is appended to the
+        tombstone log, so a delete costs the same however large the history is.
+        Positions of the other rows stay the same until the next compaction.
+        """
+        with self._locked():
+            if self.locking:
+                self._catch_up()
+            self.flush()  # The tombstone must never reach the disk before its row
+            if position < 0 or position >= len(self.entries) or self.entries[position] is None:
+                raise IndexError(f"No history entry at position {position}")
+            entry = self.entries[position]
+            self.entries[position] = None
+            self.deleted.add(position)
+            self.index.discard(self._index_key(entry))
+            self.stats.remove(entry)
+
+            with open(self.tombstone_path, mode="a", encoding="utf-8") as file:
+                file.write(f"{position}\n")
+                if self.fsync:
+                    file.flush()
+                    os.fsync(file.fileno())
+            self._mark_seen()
+
+        if len(self.deleted) >= self.compact_threshold:
+            logging.info(f"Compacting history after {len(self.deleted)} deletes.")
+            self.compact()
+        return entry
+
+    def compact(self):
+        """Rewrite the file without tombstoned rows and discard the tombstone log."""
+        self.rewrite()
+
+    def clear(self):
+        """Remove every entry and archive, leaving only the header row on disk."""
+        with self._locked():
+            if self.locking:
+                self._catch_up()  # Rows other processes added are cleared too, not written back
+            for path in self.archive_paths():
+                os.remove(path)
+            self._unflushed = []
+            self.rewrite([])  # Header only; an explicit list does not catch up again
+            self.reload()  # Reading the empty file back resets the view in either format
+            self.stats.clear()
+            self.save_stats()
+
+    def append(self, entry):
+        """Append a single history row, flushing according to the flush policy."""
+        self._unflushed.append(entry)
+        if self._closed:
+            self._register_close()  # Written to again after close(); close it again at exit
+
+        if self.flush_policy == "write":
+            self.flush()
+        elif self.flush_policy == "every_n" and len(self._unflushed) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Write buffered rows to the operating system (and to disk when fsync is on)."""
+        if not self._unflushed:
+            return
+        with self._locked():
+            if self.locking:
+                self._catch_up()  # Rows of other processes go first, and may make ours duplicates
+            while self._unflushed:
+                if self._rotation_due():
+                    self._rotate()  # The rows still to be written start the new segment
+                if self._file is None:
+                    self._open()
+                self._write_rows()  # Up to the next retention limit, so a batch is split across segments
+                self._file.flush()  # The archive is copied from the file
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            if self._seen is not None:
+                # Only the file size changed since _catch_up; one fstat instead of two stats
+                self._seen = (*self._seen[:2], os.fstat(self._file.fileno()).st_size, self._seen[3])
+            else:
+                self._mark_seen()
+
+    @contextmanager
+    def batch(self):
+        """Group every row appended inside the block (and nested blocks) into a single flush."""
+        if self._batch_depth == 0:
+            self._batch_policy = self.flush_policy
+            self.flush_policy = "exit"
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.flush_policy = self._batch_policy
+                self.flush()
+
+    def rewrite(self, entries=None):
+        """Replace the whole file with the given entries (the live in-memory view by default)."""
+        with self._locked():
+            if entries is None:
+                if self.locking:
+                    self._catch_up()  # Keep the rows other processes added
+                # Drop tombstoned rows from memory as well so positions stay aligned
+                entries = self.entries = list(self)
+                self.deleted = set()
+            else:
+                self.stats.stale = True  # The file no longer holds what the aggregates counted
+                self.unreadable = []  # Replaced along with every other row
+            self._unflushed = []  # Written below (or replaced by the given entries)
+            self._close_file()
+            # Write a new file and rename it over the old one, so readers and other
+            # processes see either the old or the new history, never a truncated file
+            temporary_path = self.path + ".tmp"
+            with open(temporary_path, mode="w", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(HISTORY_HEADER)
+                # Rows this store cannot parse are copied unchanged (first), so reading a
+                # history in another numeric mode never loses them
+                writer.writerows(self.unreadable)
+                writer.writerows(entries)
+                file.flush()
+                if self.fsync:
+                    os.fsync(file.fileno())
+            os.replace(temporary_path, self.path)
+            if os.path.exists(self.tombstone_path):
+                os.remove(self.tombstone_path)  # Positions in the old file no longer apply
+            self._mark_seen()
+
+    def close(self):
+        """Compact pending deletes, flush any buffered rows and close the underlying file."""
+        if self.deleted:
+            self.compact()
+        self._close_file()
+        self.save_stats()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+        if not self._closed:
+            # The exit hook holds a reference; dropping it lets a closed store (and its
+            # in-memory history) be freed instead of living until the process exits
+            atexit.unregister(self.close)
+            self._closed = True
+
+    def _register_close(self):
+        """Close the store at exit, until close() is called."""
+        atexit.register(self.close)
+        self._closed = False
+
+    def save_stats(self):
+        """Save the aggregates with the disk state they describe, so the next start can load them."""
+        with self._locked():
+            if self.locking:
+                self._catch_up()  # Rows other processes added belong in the saved aggregates
+            try:
+                self.stats.save(self.stats_path, self._disk_state())
+            except OSError:
+                pass  # The aggregates are rebuilt from the history when they cannot be loaded
+
+    def _close_file(self):
+        """Flush any buffered rows and close the append handle."""
+        try:
+            self.flush()
+        finally:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                self._writer = None
+
+    @contextmanager
+    def _locked(self):
+        """Hold the exclusive lock on the history files; nested blocks reuse it."""
+        if self._lock_depth == 0 and self.locking:
+            if self._lock_file is None:
+                self._lock_file = open(self.lock_path, mode="a")
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        self._lock_depth += 1
+        try:
+            yield
+        finally:
+            self._lock_depth -= 1
+            if self._lock_depth == 0 and self.locking:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _disk_state(self):
+        """(device, inode, size) of the history file and the tombstone log size."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        try:
+            tombstones = os.stat(self.tombstone_path).st_size
+        except FileNotFoundError:
+            tombstones = 0
+        return (stat.st_dev, stat.st_ino, stat.st_size, tombstones)
+
+    def _mark_seen(self):
+        """Record that the in-memory view matches the files as they are now."""
+        if self.locking:
+            self._seen = self._disk_state()
+
+    def _catch_up(self):
+        """
+        Apply what other processes wrote since _seen; the caller holds the lock.
+
+        Appended rows and tombstones are read incrementally. A file that was
+        replaced (compacted or cleared elsewhere) is reloaded. Entries not yet
+        flushed are re-added afterwards, so they keep their place at the end.
+        """
+        state = self._disk_state()
+        if state == self._seen:
+            return
+        pending = self._take_pending()
+        seen = self._seen
+        if (seen is not None and state is not None and state[:2] == seen[:2]
+                and state[2] >= seen[2] and state[3] >= seen[3]):
+            self._read_appended(seen, state)
+            self._seen = state
+        else:
+            if self._file is not None:
+                self._file.close()  # Points at the file that was replaced
+                self._file = None
+                self._writer = None
+            self.reload()
+        self._restore_pending(pending)
+
+    def _take_pending(self):
+        """Remove the entries not flushed yet from memory and return them."""
+        pending, self._unflushed = self._unflushed, []
+        for entry in reversed(pending):
+            self.entries.pop()  # Unflushed entries are always the last ones in memory
+            self.index.discard(self._index_key(entry))
+            self.stats.remove(entry)
+        return pending
+
+    def _restore_pending(self, pending):
+        """Re-add entries taken by _take_pending, dropping those that are now duplicates."""
+        for entry in pending:
+            if self.remember(entry):
+                self._unflushed.append(entry)
+
+    def _write_rows(self):
+        """Write buffered rows until the active segment reaches max_rows or max_bytes."""
+        pending = self._unflushed
+        count = len(pending)
+        if self.max_rows:
+            # At least one row, so a segment rotation could not empty still makes progress
+            count = max(min(count, self.max_rows - (len(self.entries) - count)), 1)
+        written = 0
+        for entry in pending[:count]:
+            self._write_row(entry)
+            written += 1
+            if self.max_bytes and self._file.tell() >= self.max_bytes:
+                break
+        self._unflushed = pending[written:]
+
+    def _count_rows(self):
+        """Rows in the file, counted by newlines without parsing them (only needed with max_rows)."""
+        if not self.max_rows or not os.path.exists(self.path):
+            return 0
+        with open(self.path, mode="rb") as file:
+            lines = sum(block.count(b"\n") for block in iter(lambda: file.read(1 << 20), b""))
+        return max(lines - 1, 0)  # Without the header
+
+    def _rotation_due(self, rows=None):
+        """
+        Whether the active segment reached a retention limit; the caller holds the lock.
+
+        rows is the number of rows in the file, by default those of the in-memory view.
+        """
+        if rows is None:
+            rows = len(self.entries) - len(self._unflushed)
+        if self.max_rows and rows >= self.max_rows:
+            return True
+        if not (self.max_bytes or self.rotate_interval):
+            return False
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        if self.max_bytes and stat.st_size >= self.max_bytes:
+            return True
+        # The modification time is the last write: rotate when it is in an earlier window
+        return bool(self.rotate_interval) and (stat.st_mtime // self.rotate_interval
+                                               != time.time() // self.rotate_interval)
+
+    def _rotate_if_due(self, rows=None):
+        with self._locked():
+            if self._rotation_due(rows):
+                self._rotate()
+
+    def _rotate(self):
+        """Archive the active segment and empty it; the caller holds the lock and has caught up."""
+        pending = self._take_pending()
+        rows = self._archive()
+        if rows or self.entries:  # A segment whose rows were all deleted is emptied too
+            self.entries = []
+            self.index = set()
+            self.deleted = set()
+            self.rewrite([])  # Header only; also drops the tombstone log
+            self.stats.rebuild([])  # Aggregates cover the active segment (divide-by-zero count stays)
+            if self.archive_keep:
+                for path in self.archive_paths()[:-self.archive_keep]:
+                    os.remove(path)
+        self._restore_pending(pending)
+        return rows
+
+    def _archive(self):
+        """Copy the live rows on disk to a new gzip archive, returning how many were copied."""
+        if not os.path.exists(self.path):
+            return 0
+        root, extension = os.path.splitext(self.path)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")  # Sorts oldest first
+        archive_path = f"{root}.{stamp}{extension}.gz"
+        temporary_path = archive_path + ".tmp"
+        deleted = self.load_tombstones()
+        rows = 0
+        with open(self.path, mode="r", newline="") as source, \
+                gzip.open(temporary_path, mode="wt", newline="", compresslevel=ARCHIVE_COMPRESSLEVEL) as target:
+            writer = csv.writer(target)
+            writer.writerow(HISTORY_HEADER)
+            position = 0
+            for row in csv.reader(source):
+                if is_header(row):
+                    continue
+                if parse_row(row, self.number) is None:
+                    writer.writerow(row)  # Unreadable in this mode, but kept; it has no position
+                    rows += 1
+                    continue
+                if position not in deleted:
+                    writer.writerow(row)  # Copied as written, so values keep their exact text
+                    rows += 1
+                position += 1
+        if rows:
+            os.replace(temporary_path, archive_path)
+        else:
+            os.remove(temporary_path)
+        return rows
+
+    def _read_appended(self, seen, state):
+        """Read the tombstones and rows appended between two disk states."""
+        deleted = set()
+        if state[3] > seen[3]:
+            with open(self.tombstone_path, mode="rb") as file:
+                file.seek(seen[3])
+                deleted = {int(line) for line in file.read(state[3] - seen[3]).split() if line.isdigit()}
+        for position in deleted:
+            if position < len(self.entries) and self.entries[position] is not None:
+                self.index.discard(self._index_key(self.entries[position]))
+                self.stats.remove(self.entries[position])
+                self.entries[position] = None
+        self.deleted |= deleted
+
+        with open(self.path, mode="rb") as file:
+            file.seek(seen[2])
+            lines = file.read(state[2] - seen[2]).decode("utf-8").splitlines()
+        for row in csv.reader(lines):
+            entry = parse_row(row, self.number)
+            if entry is None:
+                if not is_header(row):
+                    self.unreadable.append(row)
+                continue
+            if len(self.entries) in self.deleted or not self.remember(entry):
+                self.entries.append(None)  # Keep positions aligned with the rows on disk
+                self.deleted.add(len(self.entries) - 1)
+
+    def remember(self, entry):
+        """Add an entry to the in-memory view, returning False if it is a duplicate."""
+        # Rows parsed by this store are already normalized; outside the Decimal mode the
+        # record doubles as its key
+        key = entry if type(entry) is HistoryEntry else history_key(entry, self.number)
+        index_key = exact_key(key) if self.exact_keys else key
+        if index_key in self.index:
+            return False
+        self.stats.add(key)  # First, so the view is left unchanged if it raises
+        self.index.add(index_key)
+        self.entries.append(key)
+        return True
+
+    def _index_key(self, entry):
+        """The key an entry has in the duplicate index."""
+        key = entry if type(entry) is HistoryEntry else history_key(entry, self.number)
+        return exact_key(key) if self.exact_keys else key
+
+    def _reverse_lines(self, block_size: int = 1 << 16):
+        """Yield the non-empty lines of the file from last to first, one block at a time."""
+        with open(self.path, mode="rb") as file:
+            position = file.seek(0, os.SEEK_END)
+            remainder = b""
+            while position > 0:
+                read_size = min(block_size, position)
+                position -= read_size
+                file.seek(position)
+                lines = (file.read(read_size) + remainder).split(b"\n")
+                remainder = lines.pop(0)  # May be the tail of a line in the previous block
+                for line in reversed(lines):
+                    if line.strip():
+                        yield line.decode("utf-8").rstrip("\r")
+            if remainder.strip():
+                yield remainder.decode("utf-8").rstrip("\r")
+
+    def _write_row(self, entry):
+        """Write one entry to the open append handle."""
+        self._writer.writerow(entry)
+
+    def _open(self):
+        """Open the history file for appending, writing the header for a new file."""
+        needs_header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        self._file = open(self.path, mode="a", newline="", buffering=1 << 16)
+        self._writer = csv.writer(self._file)
+        if needs_header:
+            self._writer.writerow(HISTORY_HEADER)
@@ -0,0 +1,260 @@
+import json
+import logging
+import os
+import struct
+import numpy as np
+from app.history_store import HistoryStore, history_key
+from app.history_store.stats import HistoryStats
+
+BINARY_HISTORY_FILE = "data/history.bin"
+MAGIC = b"CALCHIS1"
+HEADER_SIZE = 256  # Magic followed by the JSON list of operation names, space padded
+
+# One fixed-width record per calculation: operation code, operands and result
+RECORD_DTYPE = np.dtype([("op", "u1"), ("a", "<f8"), ("b", "<f8"), ("result", "<f8")])
+RECORD = struct.Struct("<Bddd")  # Same layout as RECORD_DTYPE, for single appends
+CHUNK_SIZE = 65536  # Records converted to Python objects at a time while iterating
+
+def read_header(file):
+    """Read the operation names from a binary history header."""
+    header = file.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE or not header.startswith(MAGIC):
+        raise ValueError(f"Not a binary history file: {file.name}")
+    return json.loads(header[len(MAGIC):].decode("ascii"))
+
+def encode_header(operations):
+    """Build the fixed-size header for the given operation names."""
+    header = MAGIC + json.dumps(operations).encode("ascii")
+    if len(header) > HEADER_SIZE or len(operations) > 255:
+        raise ValueError("Too many operation names for the binary history header")
+    return header.ljust(HEADER_SIZE, b" ")
+
+class MappedEntries:
+    """List-like view over memory-mapped history records plus the rows appended since."""
+
+    def __init__(self, records, operations):
+        self.records = records  # Read-only, so rows are decoded only when accessed
+        self.operations = operations  # Operation name for every code
+        self.appended = []
+        self.removed = set()
+
+    def __len__(self):
+        return len(self.records) + len(self.appended)
+
+    def __getitem__(self, position):
+        if position < 0:
+            position += len(self)
+        if position in self.removed:
+            return None
+        if position < len(self.records):
+            op, a, b, result = self.records[position].item()
+            return [self.operations[op], a, b, result]
+        return self.appended[position - len(self.records)]
+
+    def __setitem__(self, position, value):
+        # Only tombstoning (setting None) is supported on mapped records
+        if value is not None:
+            raise TypeError("Mapped history records are read-only")
+        if position < len(self.records):
+            self.removed.add(position)
+        else:
+            self.appended[position - len(self.records)] = None
+
+    def __iter__(self):
+        for start in range(0, len(self.records), CHUNK_SIZE):
+            for offset, (op, a, b, result) in enumerate(self.records[start:start + CHUNK_SIZE].tolist()):
+                yield None if start + offset in self.removed else [self.operations[op], a, b, result]
+        yield from self.appended
+
+    def append(self, entry):
+        self.appended.append(entry)
+
+    def pop(self):
+        # Only entries appended since the file was mapped can be removed again
+        return self.appended.pop()
+
+class BinaryHistoryStore(HistoryStore):
+    """
+    History store backed by fixed-width binary records that are memory-mapped on load.
+
+    Loading maps the file instead of parsing it, so startup does not depend on the
+    number of rows. The duplicate index is built on first use.
+    """
+
+    def __init__(self, path: str = BINARY_HISTORY_FILE, **kwargs):
+        if kwargs.get("max_rows") or kwargs.get("max_bytes") or kwargs.get("rotate_interval"):
+            raise ValueError("History rotation is only supported for the CSV history format")
+        self._index = None
+        super().__init__(path, **kwargs)
+
+    @property
+    def index(self):
+        """Duplicate-check keys, computed from the mapped records the first time they are needed."""
+        if self._index is None:
+            entries = self.entries
+            names, removed, records = entries.operations, entries.removed, entries.records
+            index = set()
+            for start in range(0, len(records), CHUNK_SIZE):
+                # Records already hold floats, so keys are built without per-value conversion
+                rows = records[start:start + CHUNK_SIZE].tolist()
+                if removed:
+                    rows = [row for offset, row in enumerate(rows) if start + offset not in removed]
+                index.update((names[op], a, b, result) for op, a, b, result in rows)
+            index.update(history_key(entry) for entry in entries.appended if entry is not None)
+            self._index = index
+        return self._index
+
+    @index.setter
+    def index(self, value):
+        self._index = value
+
+    def read_records(self):
+        """Map the records on disk, returning (records, operation names)."""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return np.empty(0, dtype=RECORD_DTYPE), []
+        with open(self.path, mode="rb") as file:
+            operations = read_header(file)
+        count = (os.path.getsize(self.path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+        if count == 0:
+            return np.empty(0, dtype=RECORD_DTYPE), operations
+        return np.memmap(self.path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,)), operations
+
+    def iter_entries(self, unreadable=None):
+        """Stream history rows from the binary file, a chunk of records at a time (every record is readable)."""
+        records, operations = self.read_records()
+        yield from MappedEntries(records, operations)
+
+    def reload(self):
+        """Map the file and apply tombstones; nothing is parsed row by row."""
+        with self._locked():
+            self.flush()
+            records, operations = self.read_records()
+            if len(records) or operations:
+                # Drop a partial record left by an interrupted write so appends stay aligned
+                size = HEADER_SIZE + len(records) * RECORD_DTYPE.itemsize
+                if os.path.getsize(self.path) > size:
+                    logging.warning(f"Truncating partial record at the end of {self.path}.")
+                    os.truncate(self.path, size)
+            self.entries = MappedEntries(records, operations)
+            self.deleted = {position for position in self.load_tombstones() if position < len(records)}
+            self.entries.removed = set(self.deleted)
+            self._index = None
+            self._mark_seen()
+            self.stats.load(self.stats_path, self._disk_state())  # Stale unless saved for this file
+            if len(self.deleted) >= self.compact_threshold:
+                self.compact()
+
+    def tail(self, count: int, operation: str = None, archived: bool = False):
+        """Return the last count (position, entry) pairs using random access into the records."""
+        self.refresh()
+        self.flush()
+        rows = []
+        position = len(self.entries)
+        while position > 0 and len(rows) < count:
+            entry = self.entries[position - 1]
+            if entry is not None and (operation is None or entry[0] == operation):
+                rows.append((position, entry))
+            position -= 1
+        rows.reverse()
+        if archived:
+            rows[:0] = self.archived_tail(count - len(rows), operation)
+        return rows
+
+    def rewrite(self, entries=None):
+        """Replace the whole file with the given entries (the live in-memory view by default)."""
+        with self._locked():
+            self._rewrite(entries)
+
+    def _rewrite(self, entries):
+        """Write the records of rewrite(); the caller holds the lock."""
+        remap = entries is None
+        if remap:
+            if self.locking:
+                self._catch_up()  # Keep the records other processes added
+            entries = list(self)
+            self.deleted = set()
+        self._unflushed = []  # Written below (or replaced by the given entries)
+        self._close_file()
+
+        operations = sorted({entry[0] for entry in entries})
+        codes = {name: code for code, name in enumerate(operations)}
+        records = np.array([(codes[entry[0]], entry[1], entry[2], entry[3]) for entry in entries],
+                           dtype=RECORD_DTYPE)
+        # Write a new file and rename it over the old one, so any existing memory map
+        # keeps the old data instead of pointing past the end of a truncated file
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, mode="wb") as file:
+            file.write(encode_header(operations))
+            records.tofile(file)
+            file.flush()
+            if self.fsync:
+                os.fsync(file.fileno())
+        os.replace(temporary_path, self.path)
+        if os.path.exists(self.tombstone_path):
+            os.remove(self.tombstone_path)  # Positions in the old file no longer apply
+        self._mark_seen()
+
+        if remap:
+            # Compaction does not change which entries are live, so the index and aggregates stay
+            index, stats, self.stats = self._index, self.stats, HistoryStats(self.number)
+            self.reload()
+            self._index, self.stats = index, stats
+        else:
+            self.stats.stale = True  # The file no longer holds what the aggregates counted
+
+    def _read_appended(self, seen, state):
+        """Remap the file; the duplicate index is kept when other processes only appended."""
+        index, stats, known = self._index, self.stats, len(self.entries)
+        self.stats = HistoryStats(self.number)
+        self.reload()
+        self.stats = stats
+        if state[3] == seen[3]:
+            appended = [self.entries[position] for position in range(known, len(self.entries))
+                        if self.entries[position] is not None]
+            if index is not None:
+                index.update(history_key(entry) for entry in appended)
+                self._index = index
+            for entry in appended:
+                stats.add(entry)
+        else:
+            stats.stale = True  # Rows were deleted elsewhere
+
+    def _write_row(self, entry):
+        """Append one fixed-width record."""
+        self._file.write(RECORD.pack(self._operation_code(entry[0]), entry[1], entry[2], entry[3]))
+
+    def _operation_code(self, name):
+        """Return the code for an operation, adding it to the file header if it is new."""
+        operations = self.entries.operations
+        if name in operations:
+            return operations.index(name)
+        operations.append(name)
+        self._file.flush()
+        with open(self.path, mode="r+b") as file:
+            file.write(encode_header(operations))
+        return len(operations) - 1
+
+    def _open(self):
+        """Open the file for appending, writing a header for a new file."""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            with open(self.path, mode="wb") as file:
+                file.write(encode_header(self.entries.operations))
+        self._file = open(self.path, mode="ab", buffering=1 << 16)
+
+def csv_to_binary(csv_path: str, binary_path: str):
+    """Import a CSV history file into a binary history file, returning the row count."""
+    source, target = HistoryStore(csv_path), BinaryHistoryStore(binary_path)
+    entries = list(source)
+    target.rewrite(entries)
+    source.close()  # Also releases both stores' exit hooks, so they can be freed
+    target.close()
+    return len(entries)
+
+def binary_to_csv(binary_path: str, csv_path: str):
+    """Export a binary history file to the CSV format, returning the row count."""
+    source, target = BinaryHistoryStore(binary_path), HistoryStore(csv_path)
+    entries = list(source)
+    target.rewrite(entries)
+    source.close()
+    target.close()
+    return len(entries)
@@ -0,0 +1,165 @@
+import json
+import os
+
+class HistoryStats:
+    """
+    Running aggregates of the history: count, sum, minimum and maximum of the results
+    of each operation, and the number of divide-by-zero attempts.
+
+    Results that are NaN (e.g. 'add nan 1' in float mode) are left out: they have no
+    order, so they could only corrupt the sum and extremes, and a Decimal NaN raises
+    when compared. Adding or deleting an entry updates its operation in O(1). A deleted minimum or
+    maximum can only be replaced by looking at the remaining entries, so that
+    operation's extremes are recomputed the next time a summary is asked for. When the
+    aggregates are stale (no saved file matched the history on disk) every update is
+    skipped and summary() rebuilds them from the entries instead.
+    """
+
+    def __init__(self, number=float):
+        self.number = number  # Type the saved values are read back as
+        self.operations = {}  # operation -> [count, sum, minimum, maximum] of the results
+        self.divide_by_zero = 0
+        self.stale = True
+        self._dirty = set()  # Operations whose minimum or maximum was deleted
+        self._saved_divide_by_zero = 0  # Count in the stats file when it was last read or written
+
+    def add(self, entry):
+        """Account for a new entry."""
+        if self.stale:
+            return
+        operation, result = entry[0], entry[-1]
+        if is_nan(result):
+            return
+        aggregate = self.operations.get(operation)
+        if aggregate is None:
+            self.operations[operation] = [1, result, result, result]
+            return
+        aggregate[0] += 1
+        aggregate[1] += result
+        if result < aggregate[2]:
+            aggregate[2] = result
+        if result > aggregate[3]:
+            aggregate[3] = result
+
+    def remove(self, entry):
+        """Account for a deleted entry."""
+        if self.stale:
+            return
+        operation, result = entry[0], entry[-1]
+        if is_nan(result):
+            return  # Never counted by add()
+        aggregate = self.operations.get(operation)
+        if aggregate is None:
+            self.stale = True  # The aggregates never saw this entry
+            return
+        aggregate[0] -= 1
+        if aggregate[0] == 0:
+            del self.operations[operation]
+            self._dirty.discard(operation)
+            return
+        aggregate[1] -= result
+        if result <= aggregate[2] or result >= aggregate[3]:
+            self._dirty.add(operation)
+
+    def clear(self):
+        """Forget every aggregate, as when the history is cleared."""
+        self.operations = {}
+        self._dirty = set()
+        self.divide_by_zero = 0
+        self.stale = False
+
+    def record_zero_division(self):
+        self.divide_by_zero += 1
+
+    def rebuild(self, entries):
+        """Recompute the aggregates from scratch from the live entries."""
+        self.operations = {}
+        self._dirty = set()
+        self.stale = False
+        for entry in entries:
+            self.add(entry)
+
+    def summary(self, entries):
+        """
+        Return {operation: {count, sum, min, max, mean}}, sorted by operation.
+
+        entries (the live history, iterable more than once) is only read when the
+        aggregates are stale or an operation's extremes need recomputing.
+        """
+        if self.stale:
+            self.rebuild(entries)
+        if self._dirty:
+            extremes = {}
+            for operation, *_, result in entries:
+                if operation in self._dirty and not is_nan(result):
+                    low, high = extremes.get(operation, (result, result))
+                    extremes[operation] = (min(low, result), max(high, result))
+            for operation, (low, high) in extremes.items():
+                self.operations[operation][2:] = [low, high]
+            self._dirty = set()
+        return {operation: {"count": count, "sum": total, "min": low, "max": high, "mean": total / count}
+                for operation, (count, total, low, high) in sorted(self.operations.items())}
+
+    def load(self, path, state):
+        """
+        Read the aggregates saved for the given history disk state, returning whether they matched.
+
+        The divide-by-zero count is not derived from history rows, so it is read even
+        when the aggregates themselves are stale.
+        """
+        data = read_stats_file(path)
+        saved = data.get("divide_by_zero", 0)
+        self.divide_by_zero += saved - self._saved_divide_by_zero  # Keep attempts not saved yet
+        self._saved_divide_by_zero = saved
+        if state is None:
+            # No history file yet: nothing to count
+            self.operations = {}
+            self._dirty = set()
+            self.stale = False
+            return True
+        self.stale = data.get("state") != list(state)
+        if self.stale:
+            return False
+        number = self.number
+        try:
+            self.operations = {operation: [count, number(total), number(low), number(high)]
+                               for operation, (count, total, low, high) in data["operations"].items()}
+        except (KeyError, TypeError, ValueError, ArithmeticError):
+            self.stale = True  # A damaged file is rebuilt like an outdated one
+            return False
+        self._dirty = set(data.get("dirty", ()))
+        return True
+
+    def save(self, path, state):
+        """Write the aggregates with the history disk state they describe, replacing the file atomically."""
+        # Add the attempts other processes saved since this one last read the file
+        saved = read_stats_file(path).get("divide_by_zero", 0)
+        self.divide_by_zero += saved - self._saved_divide_by_zero
+        self._saved_divide_by_zero = self.divide_by_zero
+        data = {"state": None, "divide_by_zero": self.divide_by_zero, "operations": {}}
+        if not self.stale and state is not None:
+            # Values are saved as text so Decimal and Fraction results stay exact
+            data["state"] = list(state)
+            data["operations"] = {operation: [count, str(total), str(low), str(high)]
+                                  for operation, (count, total, low, high) in self.operations.items()}
+            data["dirty"] = sorted(self._dirty)
+        temporary_path = path + ".tmp"
+        with open(temporary_path, mode="w", encoding="utf-8") as file:
+            json.dump(data, file)
+        os.replace(temporary_path, path)
+
+def is_nan(value):
+    """Whether a result is NaN; a signalling Decimal NaN raises when compared, so it counts too."""
+    try:
+        return value != value  # pylint: disable=comparison-with-itself
+    except ArithmeticError:
+        return True
+
+def read_stats_file(path):
+    """Read a saved stats file, or an empty dictionary when it is missing or unreadable."""
+    try:
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
@@ -0,0 +1,185 @@
+import json
+import logging
+import os
+import threading
+import time
+
+METRICS_FILE = "logs/metrics.json"  # Where MetricsDumper writes snapshots
+PHASES = ("parse", "execute", "dedup", "save", "total")
+BUCKETS = 64  # Bucket n holds latencies below 2**n nanoseconds
+
+class Histogram:
+    """Latency histogram with power-of-two buckets, so observing a value is O(1)."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def observe(self, nanoseconds: int):
+        self.counts[nanoseconds.bit_length()] += 1
+        self.count += 1
+        self.total += nanoseconds
+        if nanoseconds > self.max:
+            self.max = nanoseconds
+
+    def percentile(self, fraction: float):
+        """Approximate percentile in nanoseconds: the upper bound of the bucket that reaches it."""
+        if not self.count:
+            return 0
+        target = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(1 << bucket, self.max)
+        return self.max
+
+    def to_dict(self):
+        """Summary in microseconds, as shown by 'stats' and written to the metrics file."""
+        return {
+            "count": self.count,
+            "mean_us": self.total / self.count / 1000 if self.count else 0.0,
+            "p50_us": self.percentile(0.5) / 1000,
+            "p95_us": self.percentile(0.95) / 1000,
+            "p99_us": self.percentile(0.99) / 1000,
+            "max_us": self.max / 1000,
+        }
+
+class Metrics:
+    """
+    Per-command counters and per-phase latency histograms.
+
+    Every command is counted. Latencies are timed for one command in sample_every,
+    which keeps the cost of leaving metrics on to a counter update for the others.
+    With enabled=False nothing is recorded.
+    """
+
+    def __init__(self, enabled: bool = True, sample_every: int = 10):
+        if sample_every < 1:
+            raise ValueError("sample_every must be at least 1")
+        self.enabled = enabled
+        self.sample_every = sample_every
+        self._countdown = 1  # The first command is always timed
+        self.reset()
+
+    def reset(self):
+        """Forget every counter and histogram."""
+        self.started = time.time()
+        self.counts = {}  # command name -> [commands, errors]
+        self.histograms = {}  # (command name, phase) -> Histogram
+
+    def start(self):
+        """
+        Begin timing a command: the current time in nanoseconds, or 0 when it is not sampled.
+
+        Callers time phases only while the returned mark is non-zero.
+        """
+        self._countdown -= 1
+        if self._countdown or not self.enabled:
+            return 0
+        self._countdown = self.sample_every
+        return time.perf_counter_ns()
+
+    def phase(self, command_name: str, phase: str, started: int):
+        """Record the time since started for a phase and return the current clock."""
+        now = time.perf_counter_ns()
+        self.observe(command_name, phase, now - started)
+        return now
+
+    def observe(self, command_name: str, phase: str, nanoseconds: int):
+        histogram = self.histograms.get((command_name, phase))
+        if histogram is None:
+            histogram = self.histograms[command_name, phase] = Histogram()
+        histogram.observe(nanoseconds)
+
+    def finish(self, command_name: str, started: int, error: bool = False):
+        """Count one command and, when it was sampled, record its total latency."""
+        if not self.enabled:
+            return
+        counts = self.counts.get(command_name)
+        if counts is None:
+            counts = self.counts[command_name] = [0, 0]
+        counts[0] += 1
+        if error:
+            counts[1] += 1
+        if started:
+            self.phase(command_name, "total", started)
+
+    def snapshot(self):
+        """Counters, throughput and phase latencies of every command as a dictionary."""
+        elapsed = max(time.time() - self.started, 1e-9)
+        commands = {}
+        # Copy the dictionaries first; the dump thread may run while commands are recorded
+        for command_name, (count, errors) in list(self.counts.items()):
+            commands[command_name] = {
+                "count": count,
+                "errors": errors,
+                "per_second": count / elapsed,
+                "phases": {},
+            }
+        for (command_name, phase), histogram in sorted(list(self.histograms.items()),
+                                                       key=lambda item: PHASES.index(item[0][1])):
+            if command_name in commands:
+                commands[command_name]["phases"][phase] = histogram.to_dict()
+        return {"since": self.started, "elapsed_s": elapsed, "commands": commands}
+
+    def report(self):
+        """Lines of the table printed by the 'stats' command."""
+        commands = self.snapshot()["commands"]
+        if not commands:
+            return ["No commands recorded yet."]
+        lines = [f"{'Command':<10} {'Phase':<8} {'Count':>8} {'Mean us':>10} {'p50 us':>10} "
+                 f"{'p95 us':>10} {'p99 us':>10} {'Max us':>10}"]
+        for command_name, command in sorted(commands.items()):
+            lines.append(f"{command_name:<10} {'':<8} {command['count']:>8} "
+                         f"errors: {command['errors']}, {command['per_second']:.1f}/s")
+            for phase, summary in command["phases"].items():
+                lines.append(f"{'':<10} {phase:<8} {summary['count']:>8} {summary['mean_us']:>10.1f} "
+                             f"{summary['p50_us']:>10.1f} {summary['p95_us']:>10.1f} "
+                             f"{summary['p99_us']:>10.1f} {summary['max_us']:>10.1f}")
+        return lines
+
+    def dump(self, path: str = METRICS_FILE):
+        """Write a snapshot as JSON, replacing the file atomically."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(self.snapshot(), file, indent=2)
+        os.replace(temporary, path)
+
+class MetricsDumper:
+    """Background thread that dumps the metrics to a file every interval seconds."""
+
+    def __init__(self, metrics: Metrics, path: str = METRICS_FILE, interval: float = 60.0):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-dumper", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the thread and write a final snapshot."""
+        self._stopped.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self._dump()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self._dump()
+
+    def _dump(self):
+        try:
+            self.metrics.dump(self.path)
+        except OSError as e:
+            logging.warning(f"Could not write metrics to {self.path}: {e}")
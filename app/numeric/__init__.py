@@ -0,0 +1,73 @@
+import decimal
+from decimal import Decimal
+from fractions import Fraction
+
+NUMERIC_MODES = ("float", "decimal", "fraction")
+# Type used to store exact values in history for each mode
+NUMBER_TYPES = {"float": float, "decimal": Decimal, "fraction": Fraction}
+ROUNDING_MODES = (decimal.ROUND_HALF_EVEN, decimal.ROUND_HALF_UP, decimal.ROUND_HALF_DOWN, decimal.ROUND_UP,
+                  decimal.ROUND_DOWN, decimal.ROUND_CEILING, decimal.ROUND_FLOOR, decimal.ROUND_05UP)
+
+class NumericMode:
+    """
+    How operands are parsed, computed and stored: float64, Decimal or Fraction.
+
+    float is the fast path: parse is the float builtin itself. decimal builds one
+    Context with the configured precision and rounding and installs it with activate(),
+    so arithmetic pays no per-operation context setup. fraction is exact rational
+    arithmetic.
+    """
+
+    def __init__(self, name: str = "float", precision: int = 28, rounding: str = decimal.ROUND_HALF_EVEN):
+        if name not in NUMERIC_MODES:
+            raise ValueError(f"Unknown numeric mode: {name}")
+        self.name = name
+        self.number = NUMBER_TYPES[name]  # Exact conversion used when reading history
+        self.context = None
+        self.parse = self.number
+        if name == "decimal":
+            if precision < 1:
+                raise ValueError("precision must be at least 1")
+            if rounding not in ROUNDING_MODES:
+                raise ValueError(f"Unknown rounding mode: {rounding}")
+            self.context = decimal.Context(prec=precision, rounding=rounding)
+            self.parse = self.parse_decimal
+
+    @property
+    def is_float(self):
+        """Whether values are plain floats (and may go through numpy)."""
+        return self.name == "float"
+
+    def parse_decimal(self, value):
+        """Convert text or a number to a finite Decimal rounded to the context precision."""
+        try:
+            number = self.context.create_decimal(value)
+        except (decimal.DecimalException, TypeError):
+            # InvalidOperation and Overflow are not ValueErrors; callers handle ValueError for bad input
+            raise ValueError(f"could not convert string to Decimal: {value!r}") from None
+        if not number.is_finite():
+            # NaN and Infinity would raise InvalidOperation in arithmetic and comparisons later
+            raise ValueError(f"Decimal operands must be finite: {value!r}")
+        return number
+
+    def activate(self):
+        """Install the Decimal context for the current thread (no-op for other modes)."""
+        if self.context is not None:
+            decimal.setcontext(self.context)
+
+def convert_number(value, number=float):
+    """
+    Convert a history value written in any numeric mode to the number type.
+
+    Every mode writes str() of its values. Float and Decimal text is read by all three
+    types, but a fraction such as '1/3' is only read by Fraction, so it is converted
+    through Fraction for the others. Raises ValueError or ArithmeticError for text no
+    mode wrote.
+    """
+    try:
+        return number(value)
+    except (ValueError, ArithmeticError):
+        if not isinstance(value, str) or "/" not in value:
+            raise
+    fraction = Fraction(value)
+    return number(fraction.numerator) / number(fraction.denominator)
@@ -0,0 +1,95 @@
+import importlib
+import inspect
+import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+PARALLEL_BACKENDS = ("process", "thread")
+
+def operations_for(commands):
+    """Map each pure arithmetic command name to the (module, class) that implements it."""
+    operations = {}
+    for name, command in commands.items():
+        if not (command.takes_numbers and command.pure and hasattr(command, "evaluate_many")):
+            continue
+        # LazyCommand knows its plugin module without importing it; plain commands use their type
+        module_name = getattr(command, "module_name", type(command).__module__)
+        class_name = getattr(command, "class_name", type(command).__name__)
+        operations[name] = (module_name, class_name)
+    return operations
+
+def evaluate_chunk(rows, operations):
+    """
+    Evaluate (command name, a, b) rows in a worker, returning (ok, entry or message) pairs.
+
+    A successful row comes back as its finished (command name, a, b, result) history
+    entry, with the operands already parsed, so the main process only records it.
+    Rows are grouped by command and evaluated with the plugin's numpy evaluate_many.
+    Rows that fail there (such as division by zero) are re-run with the scalar
+    evaluate so the error message matches the sequential path.
+    """
+    import numpy as np  # Imported in the worker; only needed for bulk evaluation
+    results = [None] * len(rows)
+    groups = {}
+    for position, (name, a, b) in enumerate(rows):
+        try:
+            operands = (float(a), float(b))
+        except ValueError as e:
+            results[position] = (False, str(e))
+            continue
+        group = groups.setdefault(name, ([], [], []))
+        group[0].append(position)
+        group[1].append(operands[0])
+        group[2].append(operands[1])
+
+    for name, (positions, a_values, b_values) in groups.items():
+        module_name, class_name = operations[name]
+        command_class = getattr(importlib.import_module(module_name), class_name)
+        options = {}
+        if "on_zero" in inspect.signature(command_class.evaluate_many).parameters:
+            options["on_zero"] = "mask"
+        values = command_class.evaluate_many(np.array(a_values), np.array(b_values), **options)
+        failed = np.ma.getmaskarray(values).tolist()
+        for position, value, a, b, masked in zip(positions, np.ma.getdata(values).tolist(),
+                                                  a_values, b_values, failed):
+            if not masked:
+                results[position] = (True, (name, a, b, value))
+                continue
+            try:
+                results[position] = (True, (name, a, b, float(command_class.evaluate(a, b))))
+            except Exception as e:
+                results[position] = (False, str(e))
+    return results
+
+class ParallelExecutor:
+    """Evaluates large lists of arithmetic rows in chunks on a pool of workers."""
+
+    def __init__(self, operations, workers: int = 2, backend: str = "process", chunk_size: int = 50000):
+        if backend not in PARALLEL_BACKENDS:
+            raise ValueError(f"Unknown parallel backend: {backend}")
+        if workers < 1 or chunk_size < 1:
+            raise ValueError("workers and chunk_size must be at least 1")
+        self.operations = operations
+        self.workers = workers
+        self.chunk_size = chunk_size
+        # numpy releases the GIL inside its loops, so threads can also use several cores
+        pool_class = ProcessPoolExecutor if backend == "process" else ThreadPoolExecutor
+        self.pool = pool_class(max_workers=workers)
+        logging.info(f"Parallel executor started with {workers} {backend} workers.")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def evaluate(self, rows):
+        """Evaluate (command name, a, b) rows, returning evaluate_chunk's results in input order."""
+        chunks = [rows[start:start + self.chunk_size] for start in range(0, len(rows), self.chunk_size)]
+        results = []
+        for chunk_results in self.pool.map(evaluate_chunk, chunks, [self.operations] * len(chunks)):
+            results.extend(chunk_results)
+        return results
+
+    def close(self):
+        """Shut the worker pool down."""
+        self.pool.shutdown()
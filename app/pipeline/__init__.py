@@ -0,0 +1,169 @@
+import codecs
+import os
+import stat
+import sys
+from contextlib import redirect_stdout
+from app.cache import MISSING
+
+READ_SIZE = 1 << 20  # Bytes read from the input at a time
+BLOCK_LINES = 4096  # Results collected before one write to the output
+
+def stdin_is_pipelined(stream=None):
+    """Whether stdin is a pipe or a regular file rather than a terminal."""
+    stream = stream or sys.stdin
+    try:
+        mode = os.fstat(stream.fileno()).st_mode
+    except (AttributeError, OSError, ValueError):
+        return False  # Replaced streams (such as under pytest) have no usable descriptor
+    return stat.S_ISFIFO(mode) or stat.S_ISREG(mode)
+
+def iter_lines(stream, read_size: int = READ_SIZE):
+    """Yield the lines of a stream, reading it in large chunks instead of line by line."""
+    source = getattr(stream, "buffer", None)
+    read = source.read if source is not None else stream.read
+    # Keeps the bytes of a character split across two chunks until the rest arrives
+    decode = codecs.getincrementaldecoder("utf-8")(errors="replace").decode
+    remainder = ""
+    while True:
+        chunk = read(read_size)
+        if not chunk:
+            chunk = decode(b"", final=True)  # Replaces an incomplete character at the very end
+            if chunk:
+                remainder += chunk
+            break
+        if isinstance(chunk, bytes):
+            chunk = decode(chunk)
+        lines = (remainder + chunk).split("\n")
+        remainder = lines.pop()  # Possibly incomplete; completed by the next chunk
+        yield from lines
+    if remainder:
+        yield remainder
+
+def iter_commands(lines):
+    """
+    Yield (line number, tokens) for each line the REPL would run, stopping at 'exit'.
+
+    Only blank lines are skipped: unlike --batch files, a line starting with '#' is
+    a command like any other, as it is when typed at the prompt.
+    """
+    for line_number, line in enumerate(lines, start=1):
+        tokens = line.split()
+        if not tokens:
+            continue
+        if tokens[0] == 'exit':
+            return
+        yield line_number, tokens
+
+class Pipeline:
+    """
+    Runs REPL commands from piped input with the same output as the interactive REPL.
+
+    Each command name is bound to a runner the first time it is used, so plugins
+    are still only imported when a command needs them: arithmetic commands have
+    their parser, evaluate method, result cache and history store looked up once,
+    while other commands run through execute_command. Output lines are collected
+    and written in blocks, and history rows are flushed once per block.
+    """
+
+    def __init__(self, command_handler, output, block_lines: int = BLOCK_LINES):
+        self.command_handler = command_handler
+        self.output = output
+        self.block_lines = block_lines
+        self.pending = []  # Output lines not written yet
+        self.table = {}  # Command name -> runner, filled in by lookup()
+
+    def lookup(self, name):
+        """Return the runner for a command name, binding it on first use, or None if there is no such command."""
+        command = self.command_handler.commands.get(name)
+        if command is None:
+            return None
+        runner = self.table[name] = self.bind(name, command)
+        return runner
+
+    def bind(self, name, command):
+        """Build the runner for one command: a callable taking the argument strings."""
+        if command.takes_numbers and hasattr(command, "evaluate"):
+            return self.bind_arithmetic(name, command)
+
+        def run(args):
+            self.write_pending()  # Keep the order of buffered results and printed output
+            with redirect_stdout(self.output):
+                self.command_handler.execute_command(name, *args)
+        return run
+
+    def bind_arithmetic(self, name, command):
+        """Runner for an arithmetic command, with its parser, evaluate, cache and history pre-bound."""
+        handler = self.command_handler
+        command = command.load() if hasattr(command, "load") else command  # Skip LazyCommand lookups
+        parse = handler.numeric.parse
+        evaluate = command.evaluate
+        cache = handler.result_cache if command.pure else None
+        add = handler.history_store.add
+        stats = handler.history_store.stats
+        metrics = handler.metrics
+        separator = f" {command.symbol} "
+        append = self.pending.append
+
+        def run(args):
+            started = metrics.start()
+            try:
+                values = [parse(arg) for arg in args]
+                if len(values) == 2:
+                    # Same steps as CommandHandler.evaluate_command, without the lookups
+                    a, b = values
+                    # Keyed like result_key(), inlined for the hot path
+                    key = None if cache is None else (name, repr(a), repr(b))
+                    result = MISSING if cache is None else cache.get(key)
+                    if result is MISSING:
+                        try:
+                            result = parse(evaluate(a, b))
+                        except ZeroDivisionError:
+                            stats.record_zero_division()
+                            raise
+                        if cache is not None:
+                            cache.put(key, result)
+                    add([name, a, b, result])
+                elif len(values) > 2:
+                    result = handler.evaluate_command(name, *values)
+                else:
+                    raise ValueError("not enough operands")
+            except ValueError:
+                append("Enter valid numbers for the operation.\n")
+                metrics.finish(name, started, True)
+                return
+            except Exception as e:
+                append(f"Error executing command '{name}': {e}\n")
+                metrics.finish(name, started, True)
+                return
+            append(f"{separator.join(map(str, values))} = {result}\n")
+            metrics.finish(name, started)
+        return run
+
+    def run(self, commands):
+        """Run (line number, tokens) pairs and return how many commands ran."""
+        table = self.table
+        store = self.command_handler.history_store
+        metrics = self.command_handler.metrics
+        count = 0
+        with store.batch():
+            for _, tokens in commands:
+                runner = table.get(tokens[0]) or self.lookup(tokens[0])
+                if runner is None:
+                    # Reported and counted like CommandHandler.execute_command does
+                    started = metrics.start()
+                    self.pending.append(f"No such command: {tokens[0]}\n")
+                    metrics.finish("unknown", started, True)
+                else:
+                    runner(tokens[1:])
+                count += 1
+                if len(self.pending) >= self.block_lines:
+                    self.write_pending()
+                    store.flush()
+        self.write_pending()
+        return count
+
+    def write_pending(self):
+        """Write the collected output lines in one call."""
+        if self.pending:
+            self.output.write("".join(self.pending))
+            self.pending.clear()
@@ -1,35 +1,26 @@
 from app.commands import Command
 import logging
-import csv
-import os
-
-HISTORY_FILE = "data/history.csv"  # Ensure this path is correct
 
 class AddCommand(Command):
+    pure = True  # Same operands always give the same result, so results can be cached
+    symbol = "+"
+
     @staticmethod
     def evaluate(a: float, b: float) -> float:
         """Perform the addition of two numbers."""
         return a + b
 
+    @staticmethod
+    def evaluate_many(a, b):
+        """Perform the addition element-wise on arrays of operands."""
+        import numpy as np  # Only needed for bulk evaluation
+        return np.add(np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64))
+
     def execute(self, *args, **kwargs): # pragma: no cover
-        """Execute the addition command and save to history."""
-        # Ensure args are converted to floats
-        a, b = map(float, args)
+        """Execute the addition command and return its result."""
+        a, b = args  # Already numbers in the configured numeric mode
         result = self.evaluate(a, b)  # Get the result of the addition
-        logging.info(f'{a} + {b} = {result}')  # Log the operation
-        print(f'{a} + {b} = {result}')  # Print the result
-        
-        # Automatically save to history
-        self.save_to_history("add", a, b, result)
+        logging.info('%s %s %s = %s', a, self.symbol, b, result)  # Log the operation (formatted only if emitted)
+        print(f'{a} {self.symbol} {b} = {result}')  # Print the result
 
-        return result  # Return the result for command history
-    
-    def save_to_history(self, operation, num1, num2, result): # pragma: no cover
-        """Append calculation result to history.csv."""
-        file_exists = os.path.exists(HISTORY_FILE)
-        
-        with open(HISTORY_FILE, mode='a', newline='') as file:
-            writer = csv.writer(file)
-            if not file_exists:
-                writer.writerow(["Operation", "Operand1", "Operand2", "Result"])  
-            writer.writerow([operation, num1, num2, result])
+        return result  # CommandHandler records the result in history
@@ -1,11 +1,10 @@
 import logging
-import csv
-import os
 from app.commands import Command
 
-HISTORY_FILE = "data/history.csv"  # Ensure this path is correct
-
 class DivideCommand(Command):
+    pure = True  # Same operands always give the same result, so results can be cached
+    symbol = "/"
+
     @staticmethod
     def evaluate(a: float, b: float) -> float:
         """Perform the division of two numbers, raising an error if the denominator is zero."""
@@ -13,24 +12,30 @@ class DivideCommand(Command):
             raise ZeroDivisionError('Cannot divide by 0!')
         return a / b
 
-    def execute(self, *args, **kwargs): # pragma: no cover
-        """Execute the division command and save to history."""
-        a, b = map(float, args)  # Convert inputs to float
-        result = self.evaluate(a, b)  # Get the result of the division
-        logging.info(f'{a} / {b} = {result}')  # Log the operation
-        print(f'{a} / {b} = {result}')  # Print the result
+    @staticmethod
+    def evaluate_many(a, b, on_zero: str = "nan"):
+        """
+        Perform the division element-wise on arrays of operands.
 
-        # Automatically save to history
-        self.save_to_history("divide", a, b, result)
+        Division by zero does not raise. With on_zero="nan" those results are NaN;
+        with on_zero="mask" a numpy masked array is returned with them masked.
+        """
+        import numpy as np  # Only needed for bulk evaluation
+        if on_zero not in ("nan", "mask"):
+            raise ValueError(f"Unknown division by zero policy: {on_zero}")
+        a, b = np.broadcast_arrays(np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64))
+        zero = b == 0
+        result = np.full(a.shape, np.nan)
+        np.divide(a, b, out=result, where=~zero)
+        if on_zero == "mask":
+            return np.ma.masked_array(result, mask=zero)
+        return result
 
-        return result  # Return the result for command history
+    def execute(self, *args, **kwargs): # pragma: no cover
+        """Execute the division command and return its result."""
+        a, b = args  # Already numbers in the configured numeric mode
+        result = self.evaluate(a, b)  # Get the result of the division
+        logging.info('%s %s %s = %s', a, self.symbol, b, result)  # Log the operation (formatted only if emitted)
+        print(f'{a} {self.symbol} {b} = {result}')  # Print the result
 
-    def save_to_history(self, operation, num1, num2, result): # pragma: no cover
-        """Append calculation result to history.csv."""
-        file_exists = os.path.exists(HISTORY_FILE)
-        
-        with open(HISTORY_FILE, mode='a', newline='') as file:
-            writer = csv.writer(file)
-            if not file_exists:
-                writer.writerow(["Operation", "Operand1", "Operand2", "Result"]) 
-            writer.writerow([operation, num1, num2, result])
+        return result  # CommandHandler records the result in history
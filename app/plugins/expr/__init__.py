@@ -0,0 +1,29 @@
+import logging
+from app.commands import Command
+from app.expression import compile_expression, evaluate_code
+
+class ExprCommand(Command):
+    takes_numbers = False  # The expression text is parsed here, not converted to floats
+
+    def __init__(self, command_handler):
+        self.command_handler = command_handler
+
+    def execute(self, *args, **kwargs):
+        """Evaluate an arithmetic expression such as (1+2)*3 and return its result."""
+        source = " ".join(args)
+        if not source.strip():
+            print("Usage: expr <expression> (e.g., expr (1 + 2) * 3)")
+            return None
+        try:
+            # Cached per numeric mode, so repeated formulas skip parsing
+            code = compile_expression(source, self.command_handler.numeric.parse)
+        except ValueError as e:
+            print(e)
+            return None
+
+        # Every step goes through the arithmetic plugins and is recorded in one history write
+        with self.command_handler.history_store.batch():
+            result = evaluate_code(code, self.command_handler.evaluate_command)
+        logging.info('%s = %s', source, result)  # Log the operation
+        print(f'{source} = {result}')  # Print the result
+        return result
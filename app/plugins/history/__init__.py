@@ -1,32 +1,64 @@
-import os
-import csv
 import logging
-import pandas as pd
-from tabulate import tabulate
 from app.commands import Command
+from app.history_store import HISTORY_HEADER
+
+SHOW_USAGE = "Usage: history show [--limit N] [--offset N] [--tail N] [--op NAME] [--all]"
+SHOW_OPTIONS = {"--limit": "limit", "--offset": "offset", "--tail": "tail", "--op": "operation"}
+
+def parse_show_options(args):
+    """Parse 'history show' options into keyword arguments for show_history."""
+    options = {}
+    if "--all" in args:
+        # Include the archived segments of the history
+        options["archived"] = True
+        args = [arg for arg in args if arg != "--all"]
+    if len(args) % 2:
+        raise ValueError(SHOW_USAGE)
+    for flag, value in zip(args[::2], args[1::2]):
+        if flag not in SHOW_OPTIONS:
+            raise ValueError(SHOW_USAGE)
+        if flag == "--op":
+            options["operation"] = value
+        elif not value.isdigit():
+            raise ValueError(f"{flag} expects a non-negative number. {SHOW_USAGE}")
+        else:
+            options[SHOW_OPTIONS[flag]] = int(value)
+    return options
 
-# Define history file path inside 'data' folder
-HISTORY_DIR = "data"
-CSV_FILE = os.path.join(HISTORY_DIR, "history.csv")
+def format_row(position, entry):
+    """Format one history row as a fixed-width line so rows can be printed as they stream."""
+    operation, a, b, result = entry
+    return f"{position:>6}  {operation:<10} {a!s:>14} {b!s:>14} {result!s:>14}"
 
-# Ensure the 'data' directory exists
-os.makedirs(HISTORY_DIR, exist_ok=True)
+def format_stats_row(operation, count, total, low, high, mean):
+    """Format one line of the 'history stats' table."""
+    return f"{operation:<10} {count!s:>8} {total!s:>14} {low!s:>14} {high!s:>14} {mean!s:>14}"
 
 class HistoryCommand(Command):
+    takes_numbers = False  # Subcommands and options are parsed here
+
     def __init__(self, command_handler):
         self.command_handler = command_handler
-        self.csv_file = CSV_FILE  # Use CSV file inside 'data'
+        self.history_store = command_handler.history_store
+        self.csv_file = self.history_store.path  # Use the CSV file the history store writes
 
     def execute(self, *args):
         """Handles history commands like show, clear, delete."""
         if len(args) == 0:
-            print("Usage: history [show|clear|delete <index>]")
+            print("Usage: history [show|stats|clear|delete <index>]")
             return
         
         command = args[0]
         
         if command == "show":
-            self.show_history()  # Ensure this method exists
+            try:
+                options = parse_show_options(args[1:])
+            except ValueError as e:
+                print(e)
+                return
+            self.show_history(**options)
+        elif command == "stats":
+            self.show_stats()
         elif command == "clear":
             self.clear_history()
         elif command == "delete" and len(args) > 1:
@@ -38,63 +70,67 @@ class HistoryCommand(Command):
         else:
             print("Unknown history command.")
 
-    def show_history(self):
-        """Show the complete command history from history.csv."""
-        if not os.path.exists(self.csv_file):
-            print("No command history found.")
-            return
-
-        try:
-            # Read history from CSV file
-            df = pd.read_csv(self.csv_file)
+    def show_history(self, limit=None, offset=0, tail=None, operation=None, archived=False):
+        """
+        Stream the command history from history.csv.
+
+        Rows are read and printed one at a time so memory use does not grow with
+        the file. With tail, only the last entries are read, from the end of the file.
+        With archived, rows of the archived segments are included; they are shown
+        with "-" as their number because only the active segment can be edited.
+        """
+        if tail is not None:
+            rows = self.history_store.tail(tail, operation, archived)[offset:]
+            if limit is not None:
+                rows = rows[:limit]
+        else:
+            rows = self.history_store.iter_rows(offset, limit, operation, archived)
 
-            if df.empty:
-                print("No command history found.")
-            else:
-                # Remove duplicate rows (if any)
-                df.drop_duplicates(inplace=True)
+        shown = 0
+        for position, entry in rows:
+            if shown == 0:
+                print(format_row("#", HISTORY_HEADER))
+            print(format_row(position, entry))
+            shown += 1
 
-                # Display the table with proper indexing (start from 1)
-                print(tabulate(df, headers='keys', tablefmt='pretty', showindex=[i+1 for i in range(len(df))], numalign="center"))
+        if shown == 0:
+            print("No command history found.")
 
-        except Exception as e:
-            print(f"Error reading history: {e}")
+    def show_stats(self):
+        """
+        Print per-operation count, sum, minimum, maximum and mean of the results.
+
+        The figures come from the aggregates the history store keeps up to date,
+        so the history itself is only read when they had to be rebuilt.
+        """
+        stats = self.history_store.stats
+        self.history_store.refresh()  # Include rows other instances added
+        summary = stats.summary(self.history_store)
+        if summary:
+            print(format_stats_row("Operation", "Count", "Sum", "Min", "Max", "Mean"))
+            for operation, values in summary.items():
+                print(format_stats_row(operation, values["count"], values["sum"], values["min"],
+                                       values["max"], values["mean"]))
+        else:
+            print("No command history found.")
+        print(f"Divide-by-zero attempts: {stats.divide_by_zero}")
 
     def clear_history(self):
         """Clear history from memory and CSV."""
-        # Clear history from memory (command_handler history list)
-        self.command_handler.history = []
-
-        # Clear the CSV file
-        with open(self.csv_file, 'w', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow(["Operation", "Operand 1", "Operand 2", "Result"])  # Write the header row only
+        self.command_handler.clear_history()
 
         logging.info("History cleared.")
         print("History cleared.")
 
     def delete_history_entry(self, index):
         """Delete a specific entry from history by index."""
-        if not os.path.exists(self.csv_file):
+        if len(self.history_store) == 0:
             print("No command history found.")
             return
 
         try:
-            df = pd.read_csv(self.csv_file)
-
-            # Convert 1-based index (from user input) to 0-based index
-            index = index - 1  # Subtract 1 to make the index 0-based
-
-            # Ensure the index is within bounds
-            if index < 0 or index >= len(df):
-                print("Invalid index. Use 'history show' to see available entries.")
-                return
-
-            df.drop(index, inplace=True)  # Delete the row
-            df.reset_index(drop=True, inplace=True)  # Reset index after deletion
-
-            df.to_csv(self.csv_file, index=False)  # Save back to CSV
-            print(f"Deleted history entry at index {index + 1}.")  # Display 1-based index
-
-        except Exception as e:
-            print(f"Error deleting history entry: {e}")
+            # Convert 1-based index (as shown by 'history show') to 0-based index
+            self.command_handler.delete_history_entry(index - 1)
+            print(f"Deleted history entry at index {index}.")  # Display 1-based index
+        except IndexError:
+            print("Invalid index. Use 'history show' to see available entries.")
@@ -1,6 +1,8 @@
 from app.commands import Command
 
 class MenuCommand(Command):
+    takes_numbers = False
+
     def execute(self, *args, **kwargs):
         """Execute the menu command, displaying available commands."""
         self.display_menu() # pragma: no cover
@@ -13,9 +15,16 @@ class MenuCommand(Command):
         print("subtract           : subtract <num1> <num2> (e.g., subtract 5 5)")
         print("multiply           : multiply <num1> <num2> (e.g., multiply 5 5)")
         print("divide             : divide <num1> <num2> (e.g., divide 5 5)")
+        print("                     add/subtract/multiply/divide accept more operands (e.g., add 1 2 3)")
+        print("expr <expression>  : Evaluate an expression (e.g., expr (1 + 2) * 3)")
         print("history show       : Display command history")
+        print("  --limit N --offset N : Page through history (e.g., history show --limit 20 --offset 40)")
+        print("  --tail N --op NAME   : Last N entries, optionally of one operation")
+        print("  --all                : Include archived history segments")
+        print("history stats      : Count, sum, min, max and mean per operation")
         print("history delete <n> : Delete the n-th entry from history")
         print("history clear      : Clear the command history")
+        print("stats              : Show command counts and latencies (stats reset clears them)")
         print("exit               : Exit the application")
         print("-------------------")
 
@@ -1,34 +1,26 @@
 import logging
-import csv
-import os
 from app.commands import Command
 
-HISTORY_FILE = "data/history.csv"  # Ensure this path is correct
-
 class MultiplyCommand(Command):
+    pure = True  # Same operands always give the same result, so results can be cached
+    symbol = "x"
+
     @staticmethod
     def evaluate(a: float, b: float) -> float:
         """Perform the multiplication of two numbers."""
         return a * b
 
+    @staticmethod
+    def evaluate_many(a, b):
+        """Perform the multiplication element-wise on arrays of operands."""
+        import numpy as np  # Only needed for bulk evaluation
+        return np.multiply(np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64))
+
     def execute(self, *args, **kwargs): # pragma: no cover
-        """Execute the multiplication command and save to history."""
-        a, b = map(float, args)  # Convert inputs to float
+        """Execute the multiplication command and return its result."""
+        a, b = args  # Already numbers in the configured numeric mode
         result = self.evaluate(a, b)  # Get the result of the multiplication
-        logging.info(f'{a} x {b} = {result}')  # Log the operation
-        print(f'{a} x {b} = {result}')  # Print the result
-
-        # Automatically save to history
-        self.save_to_history("multiply", a, b, result)
-
-        return result  # Return the result for command history
+        logging.info('%s %s %s = %s', a, self.symbol, b, result)  # Log the operation (formatted only if emitted)
+        print(f'{a} {self.symbol} {b} = {result}')  # Print the result
 
-    def save_to_history(self, operation, num1, num2, result): # pragma: no cover
-        """Append calculation result to history.csv."""
-        file_exists = os.path.exists(HISTORY_FILE)
-        
-        with open(HISTORY_FILE, mode='a', newline='') as file:
-            writer = csv.writer(file)
-            if not file_exists:
-                writer.writerow(["Operation", "Operand1", "Operand2", "Result"])  
-            writer.writerow([operation, num1, num2, result])
+        return result  # CommandHandler records the result in history
@@ -0,0 +1,21 @@
+from app.commands import Command
+
+class StatsCommand(Command):
+    takes_numbers = False  # Subcommands are parsed here
+
+    def __init__(self, command_handler):
+        self.command_handler = command_handler
+
+    def execute(self, *args):
+        """Print per-command counters and phase latencies, or reset them with 'stats reset'."""
+        metrics = self.command_handler.metrics
+        if args and args[0] == "reset":
+            metrics.reset()
+            print("Stats reset.")
+        elif args:
+            print("Usage: stats [reset]")
+        elif not metrics.enabled:
+            print("Stats are disabled (METRICS_ENABLED=false).")
+        else:
+            for line in metrics.report():
+                print(line)
@@ -0,0 +1,64 @@
+import os
+import time
+from contextlib import contextmanager
+
+STARTUP_PROFILE_FILE = "logs/startup.prof"  # Where --profile-dump writes the cProfile statistics
+
+class StartupProfile:
+    """
+    Wall-clock time of each start-up phase (logging, settings, history load, plugin
+    imports, ...), in the order they ran.
+
+    With cprofile=True a cProfile.Profile also runs from creation until stop(), so
+    the phases can be broken down by function with pstats afterwards.
+    """
+
+    def __init__(self, cprofile=False):
+        self.phases = []  # (name, seconds) pairs
+        self.profiler = None
+        if cprofile:
+            import cProfile  # Only imported when a dump is asked for
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def record(self, name, seconds):
+        """Add a phase timed elsewhere (e.g. importing the app before the profile existed)."""
+        self.phases.append((name, seconds))
+
+    @contextmanager
+    def phase(self, name):
+        """Time the body of the with block as one phase."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    @property
+    def total(self):
+        return sum(seconds for _, seconds in self.phases)
+
+    def stop(self):
+        if self.profiler is not None:
+            self.profiler.disable()
+
+    def report(self):
+        """Return the phases as printable lines: milliseconds and share of the total."""
+        total = self.total or 1.0  # Avoids dividing by zero when nothing was timed
+        width = max([len(name) for name, _ in self.phases] + [5])
+        lines = [f"{'Phase':<{width}}  {'ms':>8}  {'%':>5}"]
+        for name, seconds in self.phases:
+            lines.append(f"{name:<{width}}  {seconds * 1000:8.1f}  {seconds / total * 100:5.1f}")
+        lines.append(f"{'total':<{width}}  {self.total * 1000:8.1f}  {100.0:5.1f}")
+        return lines
+
+    def dump(self, path=STARTUP_PROFILE_FILE):
+        """Write the cProfile statistics for pstats (python -m pstats PATH), returning the path."""
+        if self.profiler is None:
+            raise ValueError("StartupProfile was created without cprofile=True")
+        self.stop()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.profiler.dump_stats(path)
+        return path
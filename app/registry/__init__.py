@@ -0,0 +1,132 @@
+import importlib
+import inspect
+import json
+import logging
+import os
+from app.commands import Command
+
+PLUGINS_PACKAGE = "app.plugins"
+PLUGIN_CACHE_FILE = "data/plugins.json"  # Manifest of discovered plugin commands
+
+class LazyCommand(Command):
+    """Stand-in for a plugin command that imports the plugin on first use."""
+
+    def __init__(self, module_name: str, class_name: str, command_handler=None, needs_handler: bool = False):
+        self.module_name = module_name
+        self.class_name = class_name
+        self.command_handler = command_handler
+        self.needs_handler = needs_handler
+        self._command = None
+
+    def load(self):
+        """Import the plugin module and build the real command instance once."""
+        if self._command is None:
+            command_class = getattr(importlib.import_module(self.module_name), self.class_name)
+            if self.needs_handler:
+                self._command = command_class(self.command_handler)
+            else:
+                self._command = command_class()
+            logging.debug(f"Plugin command {self.class_name} loaded from {self.module_name}.")
+        return self._command
+
+    @property
+    def loaded(self):
+        """Whether the plugin module has been imported yet."""
+        return self._command is not None
+
+    @property
+    def pure(self):
+        """Whether the plugin command declares its results cacheable."""
+        return self.load().pure
+
+    @property
+    def takes_numbers(self):
+        """Whether CommandHandler should convert the arguments to floats."""
+        return self.load().takes_numbers
+
+    def execute(self, *args, **kwargs):
+        return self.load().execute(*args, **kwargs)
+
+    def __getattr__(self, name):
+        # Only called for attributes missing here, such as evaluate or evaluate_many
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+class PluginRegistry:
+    """Discovers plugin commands once and caches the result in a manifest file."""
+
+    def __init__(self, plugins_path: str = None, package: str = PLUGINS_PACKAGE,
+                 cache_file: str = PLUGIN_CACHE_FILE):
+        self.package = package
+        self.plugins_path = plugins_path or package.replace(".", "/")
+        self.cache_file = cache_file
+
+    def signature(self):
+        """Modification times of every plugin package, used to invalidate the cache."""
+        signature = {}
+        for entry in os.scandir(self.plugins_path):
+            init_file = os.path.join(entry.path, "__init__.py")
+            if entry.is_dir() and os.path.exists(init_file):
+                signature[entry.name] = [entry.stat().st_mtime_ns, os.stat(init_file).st_mtime_ns]
+        return signature
+
+    def manifest(self):
+        """Return {plugin name: command info}, rediscovering only when plugins changed."""
+        signature = self.signature()
+        cached = self._read_cache()
+        if cached is not None and cached.get("signature") == signature:
+            return cached["plugins"]
+
+        plugins = self.discover(signature)
+        self._write_cache({"signature": signature, "plugins": plugins})
+        return plugins
+
+    def discover(self, signature=None):
+        """Import every plugin and record the command class it provides."""
+        plugins = {}
+        for plugin_name in sorted(signature if signature is not None else self.signature()):
+            module_name = f"{self.package}.{plugin_name}"
+            try:
+                plugin_module = importlib.import_module(module_name)
+            except ImportError as e:
+                logging.error(f"Error importing plugin {plugin_name}: {e}")
+                continue
+            for item_name in dir(plugin_module):
+                item = getattr(plugin_module, item_name)
+                if isinstance(item, type) and issubclass(item, Command) and item is not Command:
+                    # Use inspect to check if 'command_handler' is in the constructor
+                    init_signature = inspect.signature(item.__init__)
+                    plugins[plugin_name] = {
+                        "module": module_name,
+                        "class": item.__name__,
+                        "needs_handler": "command_handler" in init_signature.parameters,
+                    }
+        logging.info(f"Discovered {len(plugins)} plugin commands.")
+        return plugins
+
+    def register(self, command_handler):
+        """Register a lazily loaded command for every plugin in the manifest."""
+        for plugin_name, info in self.manifest().items():
+            command_handler.register_command(plugin_name, LazyCommand(
+                info["module"], info["class"], command_handler, info["needs_handler"]))
+            logging.debug(f"Command '{plugin_name}' from plugin '{plugin_name}' registered.")
+
+    def _read_cache(self):
+        """Load the manifest cache, or None when it is missing or unreadable."""
+        try:
+            with open(self.cache_file, encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _write_cache(self, manifest):
+        """Persist the manifest; failing to cache is not fatal."""
+        try:
+            directory = os.path.dirname(self.cache_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.cache_file, "w", encoding="utf-8") as file:
+                json.dump(manifest, file, indent=2)
+        except OSError as e:
+            logging.warning(f"Could not write plugin cache {self.cache_file}: {e}")
@@ -0,0 +1,110 @@
+import asyncio
+import io
+import logging
+import os
+import signal
+from contextlib import redirect_stdout
+
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+END_OF_RESPONSE = "\n"  # Each response ends with an empty line
+
+class CommandServer:
+    """
+    Serves REPL commands to many clients from one warm CommandHandler.
+
+    Clients send one command per line, in the same syntax as the REPL, and receive
+    the command's output followed by an empty line. 'exit' closes the connection.
+    Commands run one at a time on the event loop thread, so history appends (and
+    the stdout redirection used to capture output) never interleave; reading and
+    writing sockets for other clients continues between commands.
+    """
+
+    def __init__(self, command_handler, host: str = SERVER_HOST, port: int = SERVER_PORT, path: str = None):
+        self.command_handler = command_handler
+        self.host = host
+        self.port = port
+        self.path = path  # A Unix socket path takes precedence over host and port
+        self.server = None
+        self.clients = set()  # Stream writers of the connected clients
+
+    @property
+    def address(self):
+        """The socket path, or host:port with the port actually bound."""
+        if self.path:
+            return self.path
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"{host}:{port}"
+
+    async def start(self):
+        """Start listening; returns once the socket is bound."""
+        if self.path:
+            if os.path.exists(self.path):
+                os.unlink(self.path)  # A stale socket from an earlier run
+            self.server = await asyncio.start_unix_server(self.handle_client, path=self.path)
+        else:
+            self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        logging.info(f"Command server listening on {self.address}.")
+        return self
+
+    async def serve_forever(self):
+        """Serve until the task is cancelled (Ctrl+C or SIGTERM), then close the socket."""
+        if self.server is None:
+            await self.start()
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        try:
+            await self.server.serve_forever()
+        finally:
+            loop.remove_signal_handler(signal.SIGTERM)
+            await self.close()
+
+    async def close(self):
+        """Stop accepting connections and remove the Unix socket."""
+        if self.server is not None:
+            self.server.close()
+            for writer in list(self.clients):
+                writer.close()  # wait_closed() also waits for open connections
+            await self.server.wait_closed()
+            self.server = None
+        if self.path and os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def run_command(self, line: str):
+        """Run one command line and return everything it printed."""
+        tokens = line.split()
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.command_handler.execute_command(tokens[0], *tokens[1:])
+        return output.getvalue()
+
+    async def handle_client(self, reader, writer):
+        """Read commands from one client until it disconnects or sends 'exit'."""
+        self.clients.add(writer)
+        logging.info(f"Client connected ({len(self.clients)} connected).")
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    writer.write(f"Line too long.\n{END_OF_RESPONSE}".encode())
+                    break
+                if not line:
+                    break  # Client closed the connection
+                text = line.decode("utf-8", errors="replace").strip()
+                if not text:
+                    continue
+                if text == "exit":
+                    break
+                writer.write((self.run_command(text) + END_OF_RESPONSE).encode())
+                await writer.drain()
+        except ConnectionError:
+            pass  # The client went away mid-response
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+            logging.info(f"Client disconnected ({len(self.clients)} connected).")
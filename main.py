@@ -1,6 +1,94 @@
 # main.py
-from app import App    
+import argparse
+import sys
+import time
+
+_import_started = time.perf_counter()
+from app import App  # pylint: disable=wrong-import-position
+from app.profiling import STARTUP_PROFILE_FILE, StartupProfile  # pylint: disable=wrong-import-position
+IMPORT_SECONDS = time.perf_counter() - _import_started  # Reported as the first --profile-startup phase
+
+def build_parser():
+    """Build the parser for the calculator's command-line options."""
+    parser = argparse.ArgumentParser(description="Advanced calculator")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="run the commands in FILE ('-' for stdin) instead of the REPL")
+    parser.add_argument("--output", metavar="FILE",
+                        help="write batch results to FILE instead of stdout")
+    parser.add_argument("--workers", type=int, metavar="N",
+                        help="evaluate batch arithmetic on N parallel workers (default: PARALLEL_WORKERS)")
+    parser.add_argument("--serve", action="store_true",
+                        help="serve commands to clients over a socket instead of the REPL")
+    parser.add_argument("--host", help="TCP address to serve on (default: SERVER_HOST or 127.0.0.1)")
+    parser.add_argument("--port", type=int, help="TCP port to serve on (default: SERVER_PORT or 8765)")
+    parser.add_argument("--socket", metavar="PATH", help="serve on a Unix socket at PATH instead of TCP")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="start up, import every plugin, print the time of each phase and exit")
+    parser.add_argument("--profile-dump", nargs="?", const=STARTUP_PROFILE_FILE, metavar="FILE",
+                        help="with --profile-startup, also write cProfile statistics to FILE "
+                             f"(default: {STARTUP_PROFILE_FILE})")
+    return parser
+
+def parse_arguments(argv=None):
+    """Parse the command-line options for the calculator."""
+    return build_parser().parse_args(argv)
+
+def open_batch_files(args):
+    """Open the --batch input and --output target, raising OSError if either cannot be opened."""
+    source = sys.stdin if args.batch == "-" else open(args.batch, encoding="utf-8")
+    try:
+        target = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    except OSError:
+        if source is not sys.stdin:
+            source.close()
+        raise
+    return source, target
+
+def run_batch(app, args, source, target):
+    """Run a batch file through the app and return the process exit code."""
+    try:
+        errors = app.run_batch(source, target, args.workers)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+        app.shutdown()
+    return 1 if errors else 0
+
+def profile_startup(args):
+    """Time each start-up phase, including every plugin import, print the breakdown and exit."""
+    profile = StartupProfile(cprofile=args.profile_dump is not None)
+    profile.record("import app", IMPORT_SECONDS)
+    app = App(profile)
+    app.load_plugins()
+    app.import_plugins()
+    profile.stop()
+    for line in profile.report():
+        print(line)
+    if args.profile_dump is not None:
+        print(f"cProfile statistics written to {profile.dump(args.profile_dump)}")
+    app.shutdown()
+    return 0
+
+def main(argv=None):
+    """Entry point: run a batch (--batch), a server (--serve) or a start-up profile, otherwise start the REPL."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.profile_startup:
+        return profile_startup(args)
+    if args.batch:
+        # Opened before App() so a missing file is a usage error, not a traceback
+        try:
+            source, target = open_batch_files(args)
+        except OSError as e:
+            parser.error(f"cannot open batch file: {e}")
+        return run_batch(App(), args, source, target)
+    app = App()  # Instantiate an instance of App
+    if args.serve:
+        return app.serve(args.host, args.port, args.socket)
+    return app.start()
 
 # You must put this in your main.py because this forces the program to start when you run it from the command line.
 if __name__ == "__main__":
-    app = App().start()  # Instantiate an instance of App
+    sys.exit(main())
@@ -0,0 +1,164 @@
+"""
+Fixtures for the benchmark suite.
+
+Benchmarks are skipped unless pytest runs with --benchmarks. Every timing is
+collected by the `bench` fixture and saved as JSON at the end of the session
+(--benchmark_file), so runs can be compared between releases with
+--benchmark_baseline.
+"""
+import csv
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+import pytest
+from app.history_store import HISTORY_HEADER
+
+RESULTS_KEY = pytest.StashKey[dict]()
+OPERATIONS = ("add", "subtract", "multiply", "divide")
+
+class BenchmarkRecorder:
+    """Times callables and keeps the best and mean of several runs per benchmark."""
+
+    def __init__(self, results):
+        self.results = results
+
+    def measure(self, name, func, operations=1, repeat=3, setup=None):
+        """Run func repeat times (calling setup first, untimed) and record the timings."""
+        timings = []
+        for _ in range(repeat):
+            args = setup() if setup is not None else ()
+            gc.collect()
+            started = time.perf_counter()
+            func(*args)
+            timings.append(time.perf_counter() - started)
+        best = min(timings)
+        self.results[name] = {
+            "operations": operations,
+            "repeat": repeat,
+            "best_s": best,
+            "mean_s": statistics.mean(timings),
+            "per_op_us": best / operations * 1e6,
+        }
+        print(f"\n{name}: {best * 1000:.2f} ms best of {repeat}, {best / operations * 1e6:.3f} us/op")
+        return self.results[name]
+
+    def measure_memory(self, name, func, operations=1):
+        """Record the memory still allocated by what func returns, in total and per item."""
+        gc.collect()
+        tracemalloc.start()
+        try:
+            kept = func()  # Held until the snapshot below, then released
+            gc.collect()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        del kept
+        self.results[name] = {
+            "operations": operations,
+            "bytes": current,
+            "peak_bytes": peak,
+            "bytes_per_op": current / operations,
+        }
+        print(f"\n{name}: {current / 2**20:.1f} MiB, peak {peak / 2**20:.1f} MiB, "
+              f"{current / operations:.1f} bytes/op")
+        return self.results[name]
+
+@pytest.fixture
+def bench(request):
+    """Recorder whose results are written to --benchmark_file when the session ends."""
+    return BenchmarkRecorder(request.config.stash.setdefault(RESULTS_KEY, {}))
+
+@pytest.fixture(params=[10, 1000, 10000], ids=["1k", "100k", "1m"])
+def history_rows(request, num_records):
+    """History sizes to benchmark: 1k, 100k and 1M rows with the default --num_records 100."""
+    return num_records * request.param
+
+@pytest.fixture(scope="session")
+def history_files(tmp_path_factory):
+    """Build (and reuse within the session) history CSV files of a given size."""
+    directory = tmp_path_factory.mktemp("history")
+    files = {}
+
+    def history_file(rows):
+        if rows not in files:
+            path = directory / f"history-{rows}.csv"
+            with open(path, "w", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(HISTORY_HEADER)
+                for i in range(rows):
+                    # Distinct operands keep every row unique for the duplicate index
+                    writer.writerow([OPERATIONS[i % 4], float(i), 2.0, float(i)])
+            files[rows] = path
+        return files[rows]
+
+    return history_file
+
+def environment():
+    """Describe the machine and revision the benchmarks ran on."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+def compare(results, baseline, tolerance):
+    """Return (name, baseline, current, unit) for every benchmark slower or larger than allowed."""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        # Timing benchmarks compare us/op, memory benchmarks bytes/op
+        metric, unit = ("per_op_us", "us/op") if "per_op_us" in result else ("bytes_per_op", "bytes/op")
+        if metric in previous and result[metric] > previous[metric] * (1 + tolerance):
+            regressions.append((name, previous[metric], result[metric], unit))
+    return regressions
+
+def pytest_sessionfinish(session):
+    """Save the collected results and compare them with the baseline, if one was given."""
+    config = session.config
+    results = config.stash.get(RESULTS_KEY, None)
+    if not results:
+        return
+    path = config.getoption("--benchmark_file")
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    report = {"environment": environment(), "num_records": int(config.getoption("--num_records")),
+              "results": results}
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+
+    baseline_path = config.getoption("--benchmark_baseline")
+    lines = [f"benchmark results saved to {path}"]
+    if baseline_path:
+        with open(baseline_path, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+        tolerance = float(config.getoption("--benchmark_tolerance"))
+        regressions = compare(results, baseline, tolerance)
+        for name, before, after, unit in regressions:
+            lines.append(f"REGRESSION {name}: {before:.3f} -> {after:.3f} {unit}")
+        if regressions:
+            session.exitstatus = pytest.ExitCode.TESTS_FAILED
+        else:
+            lines.append(f"no regressions against {baseline_path} (tolerance {tolerance:.0%})")
+    reporter = config.pluginmanager.get_plugin("terminalreporter")
+    for line in lines:
+        if reporter is not None:
+            reporter.write_line(line)
+        else:  # pragma: no cover
+            print(line, file=sys.stderr)
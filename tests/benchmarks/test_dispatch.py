@@ -0,0 +1,29 @@
+"""Benchmarks for command dispatch through CommandHandler.execute_command."""
+import io
+from contextlib import redirect_stdout
+import pytest
+from tests.conftest import make_handler
+
+pytestmark = pytest.mark.benchmark
+
+@pytest.mark.parametrize("cached", [False, True], ids=["uncached", "cached"])
+def test_execute_command_throughput(bench, tmp_path, num_records, cached):
+    """Typed arithmetic commands per second, with and without the result cache."""
+    count = num_records * 100
+    # With the cache, a small set of operands repeats so most lookups hit
+    operands = [str(i % 100 if cached else i) for i in range(count)]
+
+    def setup():
+        history = tmp_path / f"history-{len(bench.results)}-{cached}.csv"
+        history.unlink(missing_ok=True)
+        return (make_handler(tmp_path, "all", cache_size=1024 if cached else None, history_path=history),)
+
+    def run(handler):
+        with redirect_stdout(io.StringIO()):
+            for operand in operands:
+                handler.execute_command("add", operand, "2")
+        handler.close()
+
+    name = f"execute_command[{'cached' if cached else 'uncached'}]"
+    result = bench.measure(name, run, operations=count, setup=setup)
+    assert result["best_s"] > 0
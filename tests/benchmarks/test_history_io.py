@@ -0,0 +1,59 @@
+"""Benchmarks for loading, saving, showing and deleting history at 1k/100k/1M rows."""
+import io
+import shutil
+from contextlib import redirect_stdout
+import pytest
+from app.plugins.history import HistoryCommand
+from tests.conftest import make_handler
+
+pytestmark = pytest.mark.benchmark
+
+@pytest.fixture
+def handler(tmp_path, history_files, history_rows):
+    """Handler over a private copy of a generated history file."""
+    path = tmp_path / "history.csv"
+    shutil.copyfile(history_files(history_rows), path)
+    handler = make_handler(tmp_path, "all", history_path=path)
+    yield handler
+    handler.close()
+
+def test_load_history(bench, handler, history_rows):
+    """Rebuilding the in-memory history and duplicate index from disk."""
+    bench.measure(f"load_history[{history_rows}]", handler.load_history, operations=history_rows)
+    assert len(handler.history_store) == history_rows
+
+def test_save_history(bench, handler, history_rows):
+    """Rewriting the complete history file."""
+    bench.measure(f"save_history[{history_rows}]", handler.save_history, operations=history_rows)
+    assert len(handler.load_history()) == history_rows
+
+@pytest.mark.parametrize("view", ["page", "tail"])
+def test_show_history(bench, handler, history_rows, view):
+    """Showing 100 rows from the middle of the file, or the last 100 rows."""
+    command = HistoryCommand(handler)
+    options = {"offset": history_rows // 2, "limit": 100} if view == "page" else {"tail": 100}
+    output = io.StringIO()
+
+    def run():
+        with redirect_stdout(output):
+            command.show_history(**options)
+
+    bench.measure(f"show_history[{view},{history_rows}]", run, operations=100)
+    assert "No command history found." not in output.getvalue()
+
+def test_delete_history_entry(bench, handler, history_rows):
+    """Deleting 100 rows spread across the file (tombstones, no compaction)."""
+    repeat = 3
+    # Fewer deletes for small --num_records, so every run finds its own rows
+    deletes = max(min(100, history_rows // repeat), 1)
+    step = history_rows // deletes  # At least repeat
+    # Each run deletes a different set of rows so none of them is already gone
+    rounds = iter(range(repeat))
+
+    def run():
+        first = next(rounds)
+        for position in range(first, deletes * step, step):
+            handler.delete_history_entry(position)
+
+    bench.measure(f"delete_history_entry[{history_rows}]", run, operations=deletes, repeat=repeat)
+    assert len(handler.history_store) == history_rows - repeat * deletes
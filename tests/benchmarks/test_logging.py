@@ -0,0 +1,41 @@
+"""Benchmarks for the caller-side latency of synchronous and queued (LOG_MODE=queue) file logging."""
+import logging
+import queue
+from logging.handlers import QueueListener
+import pytest
+from app import DeferredQueueHandler
+
+pytestmark = pytest.mark.benchmark
+
+@pytest.mark.parametrize("mode", ["sync", "queue"])
+def test_logging_latency(bench, tmp_path, num_records, mode):
+    """Hot-path style log calls, timed on the calling thread only."""
+    count = num_records * 50
+    repeat = 3
+    path = tmp_path / f"{mode}.log"
+    file_handler = logging.FileHandler(path)
+    file_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    logger = logging.getLogger(f"benchmark.{mode}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    listener = None
+    if mode == "queue":
+        log_queue = queue.SimpleQueue()
+        logger.handlers = [DeferredQueueHandler(log_queue)]
+        listener = QueueListener(log_queue, file_handler)
+        listener.start()
+    else:
+        logger.handlers = [file_handler]
+
+    def run():
+        for i in range(count):
+            logger.info("%s %s %s = %s", float(i), "+", 1.0, i + 1.0)
+
+    try:
+        bench.measure(f"logging_latency[{mode}]", run, operations=count, repeat=repeat)
+    finally:
+        if listener is not None:
+            listener.stop()  # Drains the queue before returning
+        file_handler.close()
+        logger.handlers = []
+    assert len(path.read_text().splitlines()) == count * repeat  # Nothing is lost
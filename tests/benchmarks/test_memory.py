@@ -0,0 +1,19 @@
+"""Benchmarks for the resident memory of the in-memory history at 1k/100k/1M rows."""
+import pytest
+from app.history_store import HistoryStore
+
+pytestmark = pytest.mark.benchmark
+
+def test_history_memory(bench, history_files, history_rows):
+    """Memory kept by a loaded history store (records and duplicate index), per entry."""
+    path = history_files(history_rows)
+    stores = []
+
+    def load():
+        stores.append(HistoryStore(str(path), locking=False))
+        return stores[-1]
+
+    result = bench.measure_memory(f"history_memory[{history_rows}]", load, operations=history_rows)
+    assert len(stores[0]) == history_rows
+    assert result["bytes"] > 0
+    stores[0].close()
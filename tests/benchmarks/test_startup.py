@@ -0,0 +1,33 @@
+"""Benchmarks for application start-up: App() and plugin registration."""
+import os
+import subprocess
+import sys
+import pytest
+from app import App
+from tests.conftest import COLD_START
+
+pytestmark = pytest.mark.benchmark
+
+def test_cold_start(bench, app_environment):
+    """Importing the app, App() and load_plugins() in a new Python process."""
+    def run():
+        output = subprocess.run([sys.executable, "-c", COLD_START], capture_output=True, text=True,
+                                check=True, env=os.environ.copy()).stdout
+        timings.append(float(output))
+
+    timings = []
+    run()  # Writes the plugin manifest, so the timed runs use the cached manifest
+    bench.measure("startup[cold_process]", run, repeat=5)
+    # Time measured inside the child, without interpreter start-up itself
+    bench.results["startup[cold_in_process]"] = {
+        "operations": 1, "repeat": 5, "best_s": min(timings[1:]),
+        "mean_s": sum(timings[1:]) / 5, "per_op_us": min(timings[1:]) * 1e6,
+    }
+
+def test_warm_start(bench, app_environment):
+    """App() and load_plugins() once their modules are already imported."""
+    def run():
+        App().load_plugins()
+
+    result = bench.measure("startup[warm]", run, repeat=5)
+    assert result["best_s"] > 0
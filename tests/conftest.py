@@ -4,15 +4,106 @@ Pytest configuration file.
 This file defines shared fixtures and command-line options for pytest.
 It includes:
 - A `--num_records` argument to control the number of test records.
+- Opt-in benchmark options (`--benchmarks`, `--benchmark_file`, `--benchmark_baseline`).
+- A `--startup_budget` argument: the cold start-up time, in ms, tests/test_startup.py allows.
+- The cold start-up snippet and `app_environment` fixture shared with tests/benchmarks/test_startup.py.
+- `make_handler`, the CommandHandler factory shared by the unit tests and the benchmarks.
 - Fixtures for dynamically generating test data using Faker.
 """
 
 import pytest
 from faker import Faker
+from app.cache import ResultCache
+from app.commands import CommandHandler
+from app.history_store import HistoryStore
+from app.numeric import NumericMode
+from app.plugins.add import AddCommand
+from app.plugins.divide import DivideCommand
+from app.plugins.expr import ExprCommand
+from app.plugins.history import HistoryCommand
+from app.plugins.multiply import MultiplyCommand
+from app.plugins.stats import StatsCommand
+from app.plugins.subtract import SubtractCommand
+from app.registry import PluginRegistry
+
+# Imports the app, builds App() and registers plugins, printing the seconds taken;
+# run with `python -c` in a fresh interpreter so imports are not already cached
+COLD_START = """
+import time
+started = time.perf_counter()
+from app import App
+app = App()
+app.load_plugins()
+print(time.perf_counter() - started)
+"""
+
+ARITHMETIC = ("add", "subtract", "multiply", "divide")
+
+# Builds each command make_handler can register by name, given the handler
+COMMANDS = {
+    "add": lambda handler: AddCommand(),
+    "subtract": lambda handler: SubtractCommand(),
+    "multiply": lambda handler: MultiplyCommand(),
+    "divide": lambda handler: DivideCommand(),
+    "expr": ExprCommand,
+    "history": HistoryCommand,
+    "stats": StatsCommand,
+}
+
+def make_handler(tmp_path, commands=(), numeric="float", metrics=None, cache_size=None, history_path=None):
+    """
+    Create a CommandHandler whose history lives in tmp_path/history.csv (or history_path).
+
+    commands are names from COMMANDS, or "all" to register every plugin through the
+    PluginRegistry as the app does. numeric names the mode ("float", "decimal" or
+    "fraction"), activated with a precision of 10; metrics is passed to the handler
+    as is, and cache_size turns on a ResultCache of that size.
+    """
+    mode = NumericMode(numeric, precision=10)
+    mode.activate()
+    store = HistoryStore(str(history_path or tmp_path / "history.csv"), number=mode.number)
+    handler = CommandHandler(store, ResultCache(cache_size) if cache_size else None,
+                             metrics=metrics, numeric=mode)
+    if commands == "all":
+        PluginRegistry(cache_file=str(tmp_path / "plugins.json")).register(handler)
+    else:
+        for name in commands:
+            handler.register_command(name, COMMANDS[name](handler))
+    return handler
 
 def pytest_addoption(parser):
     """Add custom command-line arguments for pytest."""
     parser.addoption("--num_records", action="store", default="100", help="Number of records to generate")
+    parser.addoption("--benchmarks", action="store_true", default=False,
+                     help="Run the benchmark suite in tests/benchmarks")
+    parser.addoption("--benchmark_file", action="store", default="logs/benchmarks.json",
+                     help="Where to save benchmark results as JSON")
+    parser.addoption("--benchmark_baseline", action="store", default=None,
+                     help="Earlier benchmark JSON to compare against; slower results fail the run")
+    parser.addoption("--benchmark_tolerance", action="store", default="0.25",
+                     help="Allowed slowdown against the baseline (0.25 = 25%)")
+    parser.addoption("--startup_budget", action="store", default="1000",
+                     help="Longest allowed cold start-up (import, App() and load_plugins) in ms")
+
+def pytest_collection_modifyitems(config, items):
+    """Skip benchmark tests unless --benchmarks is given."""
+    if config.getoption("--benchmarks"):
+        return
+    skip = pytest.mark.skip(reason="benchmarks run only with --benchmarks")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+@pytest.fixture
+def app_environment(tmp_path, monkeypatch):
+    """Keep the history and plugin manifest of start-up tests out of data/."""
+    monkeypatch.setenv("HISTORY_FILE", str(tmp_path / "history.csv"))
+    monkeypatch.setenv("PLUGIN_CACHE_FILE", str(tmp_path / "plugins.json"))
+
+@pytest.fixture
+def startup_budget(request):
+    """Provide the cold start-up budget in seconds."""
+    return float(request.config.getoption("--startup_budget")) / 1000
 
 @pytest.fixture
 def num_records(request):
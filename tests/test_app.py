@@ -1,6 +1,8 @@
 """Import pytest for testing the App class and its functionalities."""
+import io
 import pytest
 from app import App
+from main import main
 
 @pytest.mark.parametrize("Command", [
     ('add'),
@@ -62,3 +64,37 @@ def test_environment_variable_missing(monkeypatch):
     monkeypatch.setattr('os.environ', {})  # Simulate an empty environment
     app = App()
     assert app.settings.get('ENVIRONMENT') == 'DEVELOPMENT'  # Default value
+
+def test_run_batch_writes_results(tmp_path, monkeypatch):
+    """Batch mode writes one result per line and groups history writes."""
+    monkeypatch.setenv('HISTORY_FILE', str(tmp_path / 'history.csv'))
+    app = App()
+    output = io.StringIO()
+    lines = ['add 1 2', '', '# comment', 'divide 1 0', 'bogus 1 2', 'multiply  2 3', 'exit', 'add 5 5']
+    errors = app.run_batch(lines, output)
+    assert errors == 2
+    assert output.getvalue().splitlines() == [
+        '3.0',
+        'Error on line 4: Cannot divide by 0!',
+        'Error on line 5: Unknown command: bogus',
+        '6.0',
+    ]
+    assert app.command_handler.history_store.load() == [['add', 1.0, 2.0, 3.0], ['multiply', 2.0, 3.0, 6.0]]
+
+def test_main_batch_file(tmp_path, monkeypatch):
+    """main.py --batch reads a command file and writes results to --output."""
+    monkeypatch.setenv('HISTORY_FILE', str(tmp_path / 'history.csv'))
+    commands = tmp_path / 'commands.txt'
+    commands.write_text('subtract 5 2\nhistory show\n')
+    results = tmp_path / 'results.txt'
+    assert main(['--batch', str(commands), '--output', str(results)]) == 0
+    lines = results.read_text().splitlines()
+    assert lines[0] == '3.0'
+    assert any('subtract' in line for line in lines[1:])
+
+def test_main_batch_missing_file(tmp_path, capsys):
+    """A --batch file that cannot be opened is reported as a usage error."""
+    with pytest.raises(SystemExit) as e:
+        main(['--batch', str(tmp_path / 'missing.txt')])
+    assert e.value.code == 2
+    assert "cannot open batch file" in capsys.readouterr().err
@@ -0,0 +1,90 @@
+"""Test the memory-mapped binary history format."""
+import numpy as np
+import pytest
+from app.history_store import HistoryStore
+from app.history_store.binary import (HEADER_SIZE, RECORD_DTYPE, BinaryHistoryStore,
+                                      binary_to_csv, csv_to_binary)
+
+def test_append_and_reload(tmp_path):
+    """Appended records are mapped back with their operation names."""
+    path = tmp_path / "history.bin"
+    store = BinaryHistoryStore(str(path))
+    store.add(["add", 1.0, 2.0, 3.0])
+    store.add(["divide", 1.0, 4.0, 0.25])
+    assert not store.add(["add", 1.0, 2.0, 3.0])
+    store.close()
+    assert path.stat().st_size == HEADER_SIZE + 2 * RECORD_DTYPE.itemsize
+
+    reopened = BinaryHistoryStore(str(path))
+    assert isinstance(reopened.entries.records, np.memmap)
+    assert list(reopened) == [["add", 1.0, 2.0, 3.0], ["divide", 1.0, 4.0, 0.25]]
+    assert reopened.entries[-1] == ["divide", 1.0, 4.0, 0.25]
+    assert ["divide", 1, 4, 0.25] in reopened  # Index is built lazily
+    reopened.add(["multiply", 2.0, 2.0, 4.0])
+    assert reopened.tail(2) == [(2, ["divide", 1.0, 4.0, 0.25]), (3, ["multiply", 2.0, 2.0, 4.0])]
+    assert list(reopened.iter_rows(operation="multiply")) == [(3, ["multiply", 2.0, 2.0, 4.0])]
+
+def test_delete_and_compact(tmp_path):
+    """Tombstones hide mapped records until compaction rewrites the file."""
+    path = tmp_path / "history.bin"
+    store = BinaryHistoryStore(str(path))
+    for i in range(3):
+        store.add(["add", float(i), 0.0, float(i)])
+    store.close()
+    store = BinaryHistoryStore(str(path))
+    assert store.delete(1) == ["add", 1.0, 0.0, 1.0]
+    assert [position for position, _ in store.iter_rows()] == [1, 3]
+    with pytest.raises(TypeError):
+        store.entries[0] = ["add", 9.0, 9.0, 18.0]
+    other = BinaryHistoryStore(str(path))  # Tombstones apply when the index is built lazily
+    assert ["add", 1.0, 0.0, 1.0] not in other and ["add", 2.0, 0.0, 2.0] in other
+    store.close()
+    assert list(BinaryHistoryStore(str(path))) == [["add", 0.0, 0.0, 0.0], ["add", 2.0, 0.0, 2.0]]
+    store.clear()
+    assert len(BinaryHistoryStore(str(path))) == 0
+
+def test_partial_record_is_truncated(tmp_path):
+    """A torn write at the end of the file does not misalign later appends."""
+    path = tmp_path / "history.bin"
+    store = BinaryHistoryStore(str(path))
+    store.add(["add", 1.0, 1.0, 2.0])
+    store.close()
+    with open(path, "ab") as file:
+        file.write(b"\x00\x01\x02")
+    store = BinaryHistoryStore(str(path))
+    store.add(["add", 2.0, 2.0, 4.0])
+    store.close()
+    assert list(BinaryHistoryStore(str(path))) == [["add", 1.0, 1.0, 2.0], ["add", 2.0, 2.0, 4.0]]
+
+def test_csv_round_trip(tmp_path):
+    """History converts to the binary format and back without loss."""
+    csv_path, binary_path, export_path = (str(tmp_path / name) for name in ("h.csv", "h.bin", "out.csv"))
+    HistoryStore(csv_path).rewrite([["add", 0.1, 0.2, 0.1 + 0.2], ["subtract", 5.0, 7.5, -2.5]])
+    assert csv_to_binary(csv_path, binary_path) == 2
+    assert binary_to_csv(binary_path, export_path) == 2
+    assert HistoryStore(export_path).entries == HistoryStore(csv_path).entries
+
+def test_app_selects_binary_format(tmp_path, monkeypatch):
+    """HISTORY_FORMAT=binary imports the existing CSV on first use."""
+    from app import App  # pylint: disable=import-outside-toplevel
+    csv_path = tmp_path / "history.csv"
+    HistoryStore(str(csv_path)).rewrite([["multiply", 2.0, 3.0, 6.0]])
+    monkeypatch.setenv("HISTORY_FILE", str(csv_path))
+    monkeypatch.setenv("HISTORY_BINARY_FILE", str(tmp_path / "history.bin"))
+    monkeypatch.setenv("HISTORY_FORMAT", "binary")
+    store = App().command_handler.history_store
+    assert isinstance(store, BinaryHistoryStore)
+    assert list(store) == [["multiply", 2.0, 3.0, 6.0]]
+
+def test_refresh_maps_records_from_other_store(tmp_path):
+    """Records appended through another store are seen after refresh, and not re-added."""
+    path = str(tmp_path / "history.bin")
+    first = BinaryHistoryStore(path)
+    first.add(["add", 0.0, 0.0, 0.0])
+    second = BinaryHistoryStore(path)
+    assert len(second.index) == 1  # Built before the other store appends
+    first.add(["add", 1.0, 2.0, 3.0])
+    second.refresh()
+    assert list(second) == [["add", 0.0, 0.0, 0.0], ["add", 1.0, 2.0, 3.0]]
+    assert second.add(["add", 1.0, 2.0, 3.0]) is False
+    assert len(BinaryHistoryStore(path).load()) == 2
@@ -0,0 +1,97 @@
+"""Test the result cache for pure commands."""
+import io
+import pytest
+from app.cache import MISSING, ResultCache
+from app.commands import CommandHandler
+from app.history_store import HistoryStore
+from app.plugins.add import AddCommand
+
+class CountingAdd(AddCommand):
+    """AddCommand that counts how often it actually runs."""
+    calls = 0
+
+    def execute(self, *args, **kwargs):
+        CountingAdd.calls += 1
+        return super().execute(*args, **kwargs)
+
+def test_lru_eviction_and_counters():
+    """The least recently used key is evicted first."""
+    cache = ResultCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # 'b' is now least recently used
+    cache.put("c", 3)
+    assert "b" not in cache and "a" in cache and "c" in cache
+    assert cache.get("b") is MISSING
+    assert cache.stats() == {"size": 2, "max_size": 2, "policy": "lru",
+                             "hits": 1, "misses": 1, "hit_rate": 0.5}
+
+def test_lfu_eviction():
+    """The least frequently used key is evicted, oldest first on ties."""
+    cache = ResultCache(max_size=2, policy="lfu")
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.get("a")
+    cache.put("c", 3)  # Evicts 'b' (used once)
+    assert "b" not in cache and cache.get("a") == 1
+    cache.put("c", 4)  # Updating counts as a use
+    cache.put("d", 5)  # 'c' has 2 uses, 'a' has 4
+    assert "c" not in cache and "a" in cache and "d" in cache
+    cache.clear()
+    assert len(cache) == 0 and cache.get("a") is MISSING
+
+def test_invalid_settings():
+    """Unknown policies and empty caches are rejected."""
+    with pytest.raises(ValueError):
+        ResultCache(policy="fifo")
+    with pytest.raises(ValueError):
+        ResultCache(max_size=0)
+
+def test_handler_reuses_cached_results(tmp_path, capsys):
+    """Repeated calculations skip the plugin but still print the result."""
+    CountingAdd.calls = 0
+    cache = ResultCache()
+    handler = CommandHandler(HistoryStore(str(tmp_path / "history.csv")), cache)
+    handler.register_command("add", CountingAdd())
+    handler.execute_command("add", "2", "3")
+    handler.execute_command("add", "2", "3")
+    assert CountingAdd.calls == 1
+    assert capsys.readouterr().out.splitlines() == ["2.0 + 3.0 = 5.0", "2.0 + 3.0 = 5.0"]
+    assert handler.evaluate_command("add", "2", "3") == 5.0
+    assert cache.hits == 2 and cache.misses == 1
+
+def test_equal_operands_with_different_results_are_cached_apart(tmp_path, monkeypatch, capsys):
+    """-0.0 == 0.0, but multiplying them gives -0.0 and 0.0; neither run nor piped input mixes them up."""
+    from app import App  # pylint: disable=import-outside-toplevel
+    from app.plugins.multiply import MultiplyCommand  # pylint: disable=import-outside-toplevel
+    handler = CommandHandler(HistoryStore(str(tmp_path / "history.csv")), ResultCache())
+    handler.register_command("multiply", MultiplyCommand())
+    handler.execute_command("multiply", "-0", "5")
+    handler.execute_command("multiply", "0", "5")
+    assert capsys.readouterr().out.splitlines() == ["-0.0 x 5.0 = -0.0", "0.0 x 5.0 = 0.0"]
+
+    monkeypatch.setenv("HISTORY_FILE", str(tmp_path / "piped.csv"))
+    output = io.StringIO()
+    App().run_pipe(io.StringIO("multiply -0 5\nmultiply 0 5\n"), output)
+    assert output.getvalue().splitlines() == ["-0.0 x 5.0 = -0.0", "0.0 x 5.0 = 0.0"]
+
+def test_handler_without_cache(tmp_path):
+    """With caching switched off every call reaches the plugin."""
+    CountingAdd.calls = 0
+    handler = CommandHandler(HistoryStore(str(tmp_path / "history.csv")))
+    handler.register_command("add", CountingAdd())
+    handler.execute_command("add", "2", "3")
+    handler.execute_command("add", "2", "3")
+    assert CountingAdd.calls == 2
+
+def test_app_cache_settings(monkeypatch, tmp_path):
+    """The cache is configured from App.settings."""
+    from app import App  # pylint: disable=import-outside-toplevel
+    monkeypatch.setenv("HISTORY_FILE", str(tmp_path / "history.csv"))
+    monkeypatch.setenv("CACHE_SIZE", "8")
+    monkeypatch.setenv("CACHE_POLICY", "lfu")
+    cache = App().command_handler.result_cache
+    assert cache.max_size == 8 and cache.policy == "lfu"
+    monkeypatch.setenv("CACHE_ENABLED", "false")
+    assert App().command_handler.result_cache is None
@@ -0,0 +1,97 @@
+"""Test the CommandHandler history bookkeeping."""
+from app.commands import CommandHandler, history_key
+from app.history_store import HistoryStore
+from app.plugins.history import HistoryCommand
+from tests.conftest import make_handler
+
+def test_history_key_normalizes_numbers():
+    """Ints, floats and numeric strings map to the same key."""
+    assert history_key(["add", 1, "2", 3.0]) == history_key(["add", 1.0, 2.0, 3])
+
+def test_add_history_entry_detects_duplicates(tmp_path):
+    """Only the first copy of an entry is kept."""
+    handler = make_handler(tmp_path)
+    assert handler.add_history_entry(["add", 1.0, 2.0, 3.0])
+    assert not handler.add_history_entry(["add", 1, 2, 3])
+    assert handler.history == [["add", 1.0, 2.0, 3.0]]
+
+def test_index_is_built_from_loaded_history(tmp_path):
+    """Entries already on disk are treated as duplicates after a restart."""
+    path = str(tmp_path / "history.csv")
+    HistoryStore(path).rewrite([["multiply", 2.0, 3.0, 6.0]])
+    handler = CommandHandler(HistoryStore(path))
+    assert ("multiply", 2.0, 3.0, 6.0) in handler.history_index
+    assert not handler.add_history_entry(["multiply", 2.0, 3.0, 6.0])
+
+def test_history_clear_resets_index(tmp_path, capsys):
+    """Clearing through the history command drops the index too."""
+    handler = make_handler(tmp_path)
+    handler.add_history_entry(["add", 1.0, 2.0, 3.0])
+    HistoryCommand(handler).clear_history()
+    assert handler.history == [] and handler.history_index == set()
+    assert handler.add_history_entry(["add", 1.0, 2.0, 3.0])
+
+def test_history_delete_updates_index(tmp_path, capsys):
+    """Deleting a row makes the same calculation storable again."""
+    handler = make_handler(tmp_path)
+    for entry in (["add", 1.0, 2.0, 3.0], ["subtract", 5.0, 1.0, 4.0]):
+        handler.add_history_entry(entry)
+    HistoryCommand(handler).delete_history_entry(1)
+    assert handler.history == [["subtract", 5.0, 1.0, 4.0]]
+    assert list(HistoryStore(handler.history_store.path)) == [["subtract", 5.0, 1.0, 4.0]]
+    assert handler.add_history_entry(["add", 1.0, 2.0, 3.0])
+
+def test_history_delete_invalid_index(tmp_path, capsys):
+    """Out-of-range deletes leave the history untouched."""
+    handler = make_handler(tmp_path)
+    HistoryCommand(handler).delete_history_entry(1)
+    handler.add_history_entry(["add", 1.0, 2.0, 3.0])
+    HistoryCommand(handler).delete_history_entry(5)
+    assert "Invalid index" in capsys.readouterr().out
+    assert len(handler.history) == 1
+
+def test_calculation_is_written_once(tmp_path, capsys):
+    """A calculation produces exactly one row in the history file."""
+    handler = make_handler(tmp_path, ["divide"])
+    handler.execute_command("divide", "6", "3")
+    handler.close()
+    lines = (tmp_path / "history.csv").read_text().splitlines()
+    assert lines == ["Operation,Operand 1,Operand 2,Result", "divide,6.0,3.0,2.0"]
+
+def test_history_show_uses_memory(tmp_path, capsys):
+    """History is rendered from the in-memory view."""
+    handler = make_handler(tmp_path)
+    command = HistoryCommand(handler)
+    command.execute("show")
+    assert "No command history found." in capsys.readouterr().out
+    handler.add_history_entry(["multiply", 2.0, 3.0, 6.0])
+    command.execute("show")
+    assert "multiply" in capsys.readouterr().out
+
+def test_evaluate_many_dispatches_to_plugin(tmp_path):
+    """Bulk evaluation goes through the registered plugin and skips history."""
+    handler = make_handler(tmp_path, ["divide"])
+    result = handler.evaluate_many("divide", [4.0, 1.0], [2.0, 0.0], on_zero="mask")
+    assert result.mask.tolist() == [False, True]
+    assert handler.history == []
+
+def test_history_show_options(tmp_path, capsys):
+    """history show supports paging, tail and operation filters."""
+    handler = make_handler(tmp_path)
+    for i in range(1, 6):
+        handler.add_history_entry(["add" if i % 2 else "divide", float(i), 1.0, float(i)])
+    command = HistoryCommand(handler)
+    command.execute("show", "--limit", "2", "--offset", "1")
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 3 and lines[1].split()[0] == "2" and lines[2].split()[0] == "3"
+    command.execute("show", "--tail", "1", "--op", "divide")
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[1].split()[:2] == ["4", "divide"]
+    command.execute("show", "--tail", "3", "--offset", "1", "--limit", "1")
+    assert capsys.readouterr().out.splitlines()[1].split()[0] == "4"
+    command.execute("show", "--op", "subtract")
+    assert "No command history found." in capsys.readouterr().out
+    command.execute("show", "--limit")
+    command.execute("show", "--limit", "x")
+    command.execute("show", "--bogus", "1")
+    assert capsys.readouterr().out.count("Usage: history show") == 3
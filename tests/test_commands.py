@@ -1,6 +1,7 @@
 """Test commands"""
 
 from decimal import Decimal
+import numpy as np
 import pytest
 from app.plugins.add import AddCommand
 from app.plugins.subtract import SubtractCommand
@@ -41,3 +42,27 @@ def test_divide_by_zero():
     """
     with pytest.raises(ZeroDivisionError, match="Cannot divide by 0!"):  # Expect a ZeroDivisionError to be raised.
         DivideCommand().evaluate(Decimal(3), Decimal(0))  # Attempt to perform the calculation, which should trigger the ZeroDivisionError.
+
+@pytest.mark.parametrize("command, expected", [
+    (AddCommand, [5.0, 7.0, 9.0]),
+    (SubtractCommand, [-3.0, -3.0, -3.0]),
+    (MultiplyCommand, [4.0, 10.0, 18.0]),
+    (DivideCommand, [0.25, 0.4, 0.5]),
+])
+def test_evaluate_many(command, expected):
+    """Vectorized evaluation matches the scalar results element-wise."""
+    a, b = [1, 2, 3], [4, 5, 6]
+    result = command.evaluate_many(a, b)
+    assert isinstance(result, np.ndarray)
+    assert result.tolist() == pytest.approx(expected)
+    assert result.tolist() == pytest.approx([command.evaluate(x, y) for x, y in zip(a, b)])
+
+def test_evaluate_many_divide_by_zero():
+    """Division by zero yields NaN or a mask instead of raising."""
+    result = DivideCommand.evaluate_many([1, 2, 3], [1, 0, 3])
+    assert result[0] == 1.0 and np.isnan(result[1]) and result[2] == 1.0
+    masked = DivideCommand.evaluate_many([1, 2, 3], [1, 0, 3], on_zero="mask")
+    assert masked.mask.tolist() == [False, True, False]
+    assert masked.compressed().tolist() == [1.0, 1.0]
+    with pytest.raises(ValueError):
+        DivideCommand.evaluate_many([1], [0], on_zero="ignore")
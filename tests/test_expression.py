@@ -0,0 +1,69 @@
+"""Test the expression engine, the expr command and variadic operands."""
+import pytest
+from app.expression import compile_expression, evaluate_code, tokenize
+from app.plugins.add import AddCommand
+from app.plugins.divide import DivideCommand
+from app.plugins.multiply import MultiplyCommand
+from app.plugins.subtract import SubtractCommand
+from tests.conftest import ARITHMETIC, make_handler
+
+COMMANDS = ARITHMETIC + ("expr",)
+
+def test_tokenize():
+    """Numbers, operators and parentheses are recognised, with or without spaces."""
+    assert tokenize("(1.5+2)*3e1 / .5") == ["(", 1.5, "+", 2.0, ")", "*", 30.0, "/", 0.5]
+    with pytest.raises(ValueError):
+        tokenize("1 + a")
+
+@pytest.mark.parametrize("source, expected", [
+    ("1 + 2 * 3", 7.0),
+    ("(1 + 2) * 3", 9.0),
+    ("10 - 4 - 3", 3.0),
+    ("8 / 4 / 2", 1.0),
+    ("-(2 + 3) x 2", -10.0),
+    ("+4 - -1", 5.0),
+])
+def test_compile_and_evaluate(source, expected):
+    """Expressions follow the usual precedence and left associativity."""
+    operations = {"add": AddCommand.evaluate, "subtract": SubtractCommand.evaluate,
+                  "multiply": MultiplyCommand.evaluate, "divide": DivideCommand.evaluate}
+    code = compile_expression(source)
+    assert evaluate_code(code, lambda name, a, b: operations[name](a, b)) == expected
+
+@pytest.mark.parametrize("source", ["", "1 +", "(1 + 2", "1 2", "* 3", "1 + ()"])
+def test_invalid_expressions(source):
+    """Malformed expressions raise ValueError."""
+    with pytest.raises(ValueError):
+        compile_expression(source)
+
+def test_compiled_expressions_are_cached():
+    """Repeated formulas reuse the compiled code."""
+    compile_expression.cache_clear()
+    first = compile_expression("(7 + 1) / 2")
+    assert compile_expression("(7 + 1) / 2") is first
+    assert compile_expression.cache_info().hits == 1
+
+def test_expr_command_records_steps(tmp_path, capsys):
+    """Each step of an expression is evaluated by a plugin and stored in history."""
+    handler = make_handler(tmp_path, COMMANDS)
+    handler.execute_command("expr", "(1", "+", "2)", "*", "3")
+    assert capsys.readouterr().out.strip() == "(1 + 2) * 3 = 9.0"
+    assert handler.history == [["add", 1.0, 2.0, 3.0], ["multiply", 3.0, 3.0, 9.0]]
+
+def test_expr_command_errors(tmp_path, capsys):
+    """Syntax errors, empty input and division by zero are reported."""
+    handler = make_handler(tmp_path, COMMANDS)
+    handler.execute_command("expr", "1", "+")
+    handler.execute_command("expr")
+    handler.execute_command("expr", "1/0")
+    output = capsys.readouterr().out
+    assert "Invalid expression" in output and "Usage: expr" in output
+    assert "Cannot divide by 0!" in output
+
+def test_variadic_operands(tmp_path, capsys):
+    """add 1 2 3 is reduced in one pass, one history row per step."""
+    handler = make_handler(tmp_path, COMMANDS)
+    handler.execute_command("add", "1", "2", "3")
+    assert capsys.readouterr().out.strip() == "1.0 + 2.0 + 3.0 = 6.0"
+    assert handler.history == [["add", 1.0, 2.0, 3.0], ["add", 3.0, 3.0, 6.0]]
+    assert handler.evaluate_command("subtract", "10", "1", "2", "3") == 4.0
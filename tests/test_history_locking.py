@@ -0,0 +1,81 @@
+"""Tests for sharing one history file between several processes."""
+import multiprocessing
+import pytest
+from app.history_store import HistoryStore
+from app.history_store.binary import BinaryHistoryStore
+
+def write_rows(path, worker, count):
+    """Child process: add count distinct rows, flushing each one."""
+    store = HistoryStore(path)
+    for i in range(count):
+        store.add(["add", float(worker), float(i), float(worker + i)])
+    store.close()
+
+def test_processes_append_without_losing_rows(tmp_path):
+    """Rows appended by several processes at once all end up in the file exactly once."""
+    path = str(tmp_path / "history.csv")
+    workers = [multiprocessing.Process(target=write_rows, args=(path, worker, 200)) for worker in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+    entries = HistoryStore(path).load()
+    assert len(entries) == 800
+    assert len({tuple(entry) for entry in entries}) == 800
+
+def test_refresh_picks_up_rows_and_deletes(tmp_path):
+    """A store sees the rows and deletes another store wrote, without reloading everything."""
+    path = str(tmp_path / "history.csv")
+    first = HistoryStore(path)
+    second = HistoryStore(path)
+    first.add(["add", 1.0, 1.0, 2.0])
+    first.add(["add", 2.0, 2.0, 4.0])
+    first.delete(0)
+    second.refresh()
+    assert list(second) == [["add", 2.0, 2.0, 4.0]]
+    assert second.entries[0] is None  # Positions match the file
+
+def test_duplicate_from_other_process_is_not_written(tmp_path):
+    """An entry another process already wrote is dropped at flush instead of duplicated."""
+    path = str(tmp_path / "history.csv")
+    first = HistoryStore(path, flush_policy="exit")
+    second = HistoryStore(path)
+    first.add(["multiply", 2.0, 3.0, 6.0])
+    second.add(["multiply", 2.0, 3.0, 6.0])  # Written first
+    first.add(["divide", 6.0, 3.0, 2.0])
+    first.flush()
+    assert first.load() == [["multiply", 2.0, 3.0, 6.0], ["divide", 6.0, 3.0, 2.0]]
+    assert list(first) == first.load()
+
+def test_append_after_rewrite_elsewhere_reaches_new_file(tmp_path):
+    """A rewrite renames a new file into place; other stores reopen it instead of writing to the old one."""
+    path = str(tmp_path / "history.csv")
+    first = HistoryStore(path)
+    second = HistoryStore(path)
+    first.add(["add", 1.0, 1.0, 2.0])
+    second.add(["add", 5.0, 5.0, 10.0])
+    first.delete(0)
+    first.compact()  # Replaces the file
+    second.add(["subtract", 3.0, 1.0, 2.0])
+    assert HistoryStore(path).load() == [["add", 5.0, 5.0, 10.0], ["subtract", 3.0, 1.0, 2.0]]
+    assert list(second) == [["add", 5.0, 5.0, 10.0], ["subtract", 3.0, 1.0, 2.0]]
+    assert not (tmp_path / "history.csv.tmp").exists()
+
+@pytest.mark.parametrize("store_class, name", [(HistoryStore, "history.csv"), (BinaryHistoryStore, "history.bin")])
+def test_clear_removes_rows_other_stores_added(tmp_path, store_class, name):
+    """Clearing also removes rows another store appended since this one last looked."""
+    path = str(tmp_path / name)
+    first = store_class(path)
+    second = store_class(path)
+    first.add(["add", 1.0, 1.0, 2.0])
+    second.add(["add", 2.0, 2.0, 4.0])
+    second.add(["add", 3.0, 3.0, 6.0])
+    first.clear()
+    assert len(first) == 0
+    assert len(store_class(path)) == 0
+    second.refresh()
+    assert len(second) == 0
+    second.add(["add", 4.0, 4.0, 8.0])
+    assert store_class(path).load() == [["add", 4.0, 4.0, 8.0]]
+    assert first.stats.summary(first) == {}
@@ -0,0 +1,132 @@
+"""Test rotating the history into compressed archive segments."""
+import gzip
+import io
+import os
+import time
+import pytest
+from app.commands import CommandHandler
+from app.history_store import HistoryStore
+from app.history_store.binary import BinaryHistoryStore
+from app.plugins.history import HistoryCommand
+
+def entry(i):
+    return ["add", float(i), 1.0, float(i + 1)]
+
+def test_row_limit_rotates_into_archives(tmp_path):
+    """A full segment is archived before the next write; archives are read back on request."""
+    store = HistoryStore(str(tmp_path / "history.csv"), max_rows=3)
+    for i in range(7):
+        store.add(entry(i))
+    assert len(store.archive_paths()) == 2
+    assert list(store) == [entry(6)]  # Only the active segment is in memory
+    rows = list(store.iter_rows(archived=True))
+    assert [row for _, row in rows] == [entry(i) for i in range(7)]
+    assert [position for position, _ in rows] == ["-"] * 6 + [1]
+    assert [row for _, row in store.iter_rows()] == [entry(6)]
+    assert [row for _, row in store.tail(4, archived=True)] == [entry(i) for i in range(3, 7)]
+    assert store.tail(2, operation="subtract", archived=True) == []
+    with gzip.open(store.archive_paths()[0], "rt") as file:
+        assert file.read().splitlines() == ["Operation,Operand 1,Operand 2,Result",
+                                            "add,0.0,1.0,1.0", "add,1.0,1.0,2.0", "add,2.0,1.0,3.0"]
+    store.close()
+
+def test_batch_is_split_at_the_row_limit(tmp_path, monkeypatch):
+    """Rows flushed together (batch and piped input) still fill segments of max_rows rows."""
+    from app import App  # pylint: disable=import-outside-toplevel
+    path = tmp_path / "history.csv"
+    monkeypatch.setenv("HISTORY_FILE", str(path))
+    monkeypatch.setenv("HISTORY_MAX_ROWS", "3")
+    app = App()
+    app.run_batch([f"add {i} 1" for i in range(7)], io.StringIO())
+    store = app.command_handler.history_store
+    assert [len(list(store.iter_archive(archive))) for archive in store.archive_paths()] == [3, 3]
+    assert list(store) == [entry(6)]
+    assert len(path.read_text().splitlines()) == 2  # Header and one row
+    app.shutdown()
+
+def test_byte_limit_splits_a_flush(tmp_path):
+    """A flush stops at max_bytes and continues in a new segment."""
+    store = HistoryStore(str(tmp_path / "history.csv"), max_bytes=100)
+    with store.batch():
+        for i in range(20):
+            store.add(entry(i))
+    assert len(store.archive_paths()) > 1
+    assert all(os.path.getsize(archive) for archive in store.archive_paths())
+    assert [row for _, row in store.iter_rows(archived=True)] == [entry(i) for i in range(20)]
+    assert os.path.getsize(store.path) < 100 + 20
+    store.close()
+
+def test_oversized_segment_is_archived_before_loading(tmp_path):
+    """A segment over max_bytes is archived at startup instead of being loaded."""
+    path = tmp_path / "history.csv"
+    store = HistoryStore(str(path))
+    for i in range(50):
+        store.add(entry(i))
+    store.delete(0)  # Tombstoned rows are not archived
+    store.close()
+    store = HistoryStore(str(path), max_bytes=200)
+    assert len(store) == 0 and len(store.archive_paths()) == 1
+    assert [row for _, row in store.iter_rows(archived=True)] == [entry(i) for i in range(1, 50)]
+    store.close()
+    with open(path, "a") as file:
+        file.writelines(f"add,{i}.0,1.0,{i + 1}.0\n" for i in range(5))  # Written by an older version
+    store = HistoryStore(str(path), max_rows=3)
+    assert len(store) == 0 and len(store.archive_paths()) == 2  # Counted, not loaded, before rotating
+    store.close()
+
+def test_new_time_window_rotates(tmp_path):
+    """The first write in a new rotate_interval window starts a new segment."""
+    path = tmp_path / "history.csv"
+    store = HistoryStore(str(path), rotate_interval=3600)
+    store.add(entry(1))
+    store.add(entry(2))
+    assert store.archive_paths() == []
+    past = time.time() - 7200
+    os.utime(path, (past, past))  # As if the last write was two hours ago
+    store.add(entry(3))
+    assert len(store.archive_paths()) == 1
+    assert list(store) == [entry(3)]
+    store.close()
+
+def test_archive_keep_removes_oldest(tmp_path):
+    """Only the newest archive_keep archives are kept."""
+    store = HistoryStore(str(tmp_path / "history.csv"), max_rows=2, archive_keep=2)
+    for i in range(9):
+        store.add(entry(i))
+    assert len(store.archive_paths()) == 2
+    assert [row for _, row in store.iter_rows(archived=True)] == [entry(i) for i in range(4, 9)]
+    store.clear()
+    assert store.archive_paths() == []
+    store.close()
+
+def test_negative_limits_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        HistoryStore(str(tmp_path / "history.csv"), max_rows=-1)
+    with pytest.raises(ValueError):
+        BinaryHistoryStore(str(tmp_path / "history.bin"), max_rows=10)
+
+def test_history_show_all(tmp_path, capsys):
+    """'history show --all' includes archived rows; plain 'history show' does not."""
+    handler = CommandHandler(HistoryStore(str(tmp_path / "history.csv"), max_rows=2))
+    for i in range(3):
+        handler.add_history_entry(entry(i))
+    command = HistoryCommand(handler)
+    command.execute("show")
+    assert len(capsys.readouterr().out.splitlines()) == 2
+    command.execute("show", "--all", "--limit", "2")
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.split()[:3] for line in lines[1:]] == [["-", "add", "0.0"], ["-", "add", "1.0"]]
+    command.execute("show", "--tail", "2", "--all")
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.split()[0] for line in lines[1:]] == ["-", "1"]
+    handler.history_store.close()
+
+def test_app_reads_retention_settings(tmp_path, monkeypatch):
+    """Retention limits come from the environment."""
+    from app import App  # pylint: disable=import-outside-toplevel
+    monkeypatch.setenv("HISTORY_FILE", str(tmp_path / "history.csv"))
+    monkeypatch.setenv("HISTORY_MAX_ROWS", "500")
+    monkeypatch.setenv("HISTORY_ROTATE_INTERVAL", "86400")
+    monkeypatch.setenv("HISTORY_ARCHIVE_KEEP", "7")
+    store = App().command_handler.history_store
+    assert (store.max_rows, store.max_bytes, store.rotate_interval, store.archive_keep) == (500, 0, 86400.0, 7)
@@ -0,0 +1,131 @@
+"""Test the running history aggregates and the 'history stats' command."""
+from decimal import Decimal
+from app.commands import CommandHandler
+from app.history_store import HistoryStore
+from app.history_store.binary import BinaryHistoryStore
+from app.numeric import NumericMode
+from app.plugins.divide import DivideCommand
+from app.plugins.history import HistoryCommand
+
+ENTRIES = [["add", 1.0, 2.0, 3.0], ["add", 5.0, 5.0, 10.0], ["multiply", 2.0, 3.0, 6.0], ["add", 0.5, 0.5, 1.0]]
+
+def make_store(path, entries=ENTRIES, **kwargs):
+    store = HistoryStore(str(path), **kwargs)
+    store.clear()
+    for entry in entries:
+        store.add(entry)
+    return store
+
+def test_aggregates_follow_adds_deletes_and_clear(tmp_path):
+    """Incremental aggregates match a rebuild, including after deleting a minimum."""
+    store = make_store(tmp_path / "history.csv")
+    summary = store.stats.summary(store)
+    assert summary["add"] == {"count": 3, "sum": 14.0, "min": 1.0, "max": 10.0, "mean": 14.0 / 3}
+    assert summary["multiply"]["count"] == 1
+
+    store.delete(3)  # The smallest 'add' result
+    store.delete(2)  # The only 'multiply'
+    summary = store.stats.summary(store)
+    assert summary == {"add": {"count": 2, "sum": 13.0, "min": 3.0, "max": 10.0, "mean": 6.5}}
+
+    store.clear()
+    assert store.stats.summary(store) == {}
+    store.close()
+
+def test_aggregates_are_saved_and_loaded_without_rebuilding(tmp_path):
+    """A matching stats file is loaded as is; the history is not read to rebuild it."""
+    path = tmp_path / "history.csv"
+    make_store(path).close()
+    store = HistoryStore(str(path))
+    assert not store.stats.stale
+    assert store.stats.summary([])["add"]["count"] == 3  # Nothing to read from
+    store.close()
+
+def test_stale_aggregates_are_rebuilt(tmp_path):
+    """Rows written after the stats were saved make them stale; they are rebuilt when shown."""
+    path = tmp_path / "history.csv"
+    make_store(path).close()
+    with open(path, "a") as file:
+        file.write("subtract,9.0,4.0,5.0\n")
+    store = HistoryStore(str(path))
+    assert store.stats.stale
+    summary = store.stats.summary(store)
+    assert summary["subtract"] == {"count": 1, "sum": 5.0, "min": 5.0, "max": 5.0, "mean": 5.0}
+    assert summary["add"]["count"] == 3
+    store.close()
+
+def test_damaged_stats_file_is_rebuilt(tmp_path):
+    """An unreadable stats file is treated like a missing one."""
+    path = tmp_path / "history.csv"
+    make_store(path).close()
+    (tmp_path / "history.csv.stats").write_text("{not json")
+    store = HistoryStore(str(path))
+    assert store.stats.stale
+    assert store.stats.summary(store)["add"]["sum"] == 14.0
+    store.close()
+
+def test_divide_by_zero_attempts_are_counted_and_saved(tmp_path, capsys):
+    """Each failed division is counted, through the REPL and the evaluation path, and persisted."""
+    path = tmp_path / "history.csv"
+    handler = CommandHandler(make_store(path, []))
+    handler.register_command("divide", DivideCommand())
+    handler.execute_command("divide", "1", "0")
+    try:
+        handler.evaluate_command("divide", 2, 0)
+    except ZeroDivisionError:
+        pass
+    assert handler.history_store.stats.divide_by_zero == 2
+    handler.history_store.close()
+    assert HistoryStore(str(path)).stats.divide_by_zero == 2
+
+def test_decimal_aggregates_stay_exact(tmp_path):
+    """Saved aggregates are read back in the store's number type."""
+    path = tmp_path / "history.csv"
+    entries = [["add", Decimal("0.1"), Decimal("0.2"), Decimal("0.3")],
+               ["add", Decimal("1.1"), Decimal("2.2"), Decimal("3.3")]]
+    make_store(path, entries, number=Decimal).close()
+    store = HistoryStore(str(path), number=Decimal)
+    assert not store.stats.stale
+    assert store.stats.summary(store)["add"]["sum"] == Decimal("3.6")
+    store.close()
+
+def test_binary_store_keeps_aggregates(tmp_path):
+    """The binary store saves and loads the same aggregates."""
+    path = tmp_path / "history.bin"
+    store = BinaryHistoryStore(str(path))
+    for entry in ENTRIES:
+        store.add(entry)
+    store.delete(0)
+    store.close()
+    store = BinaryHistoryStore(str(path))
+    assert not store.stats.stale
+    assert store.stats.summary(store)["add"] == {"count": 2, "sum": 11.0, "min": 1.0, "max": 10.0, "mean": 5.5}
+    store.close()
+
+def test_history_stats_command(tmp_path, capsys):
+    """'history stats' prints one line per operation and the divide-by-zero count."""
+    handler = CommandHandler(make_store(tmp_path / "history.csv"), numeric=NumericMode())
+    HistoryCommand(handler).execute("stats")
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].split() == ["Operation", "Count", "Sum", "Min", "Max", "Mean"]
+    assert lines[1].split()[:5] == ["add", "3", "14.0", "1.0", "10.0"]
+    assert lines[2].split() == ["multiply", "1", "6.0", "6.0", "6.0", "6.0"]
+    assert lines[3] == "Divide-by-zero attempts: 0"
+
+    handler.history_store.clear()
+    HistoryCommand(handler).execute("stats")
+    assert capsys.readouterr().out.splitlines()[0] == "No command history found."
+    handler.history_store.close()
+
+def test_nan_results_are_left_out_of_aggregates(tmp_path):
+    """NaN rows, also when read back as Decimal NaN, do not corrupt the aggregates or the view."""
+    path = tmp_path / "history.csv"
+    make_store(path, [["add", 1.0, 1.0, 2.0], ["add", 2.0, 2.0, 4.0], ["add", float("nan"), 1.0, float("nan")]]).close()
+    store = HistoryStore(str(path), number=Decimal)  # The NaN row is read back as Decimal('NaN')
+    store.stats.rebuild(store)  # Comparing a Decimal NaN would raise InvalidOperation
+    store.add(["add", Decimal(3), Decimal(3), Decimal(6)])
+    assert len(store) == 4 and len(store.entries) == 4
+    assert store.delete(3)[3] == 6  # The row that was added, not a neighbour
+    summary = store.stats.summary(store)
+    assert summary["add"] == {"count": 2, "sum": 6, "min": 2, "max": 4, "mean": 3}
+    store.close()
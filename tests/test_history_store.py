@@ -0,0 +1,191 @@
+"""Test the append-only history store."""
+import atexit
+import gc
+import weakref
+import pytest
+from app.commands import CommandHandler
+from app.history_store import HistoryEntry, HistoryStore, history_key
+from app.plugins.add import AddCommand
+
+def read_lines(path):
+    """Return the lines currently on disk."""
+    return path.read_text().splitlines()
+
+def test_append_writes_header_and_row(tmp_path):
+    """A new file gets the header followed by the appended row."""
+    path = tmp_path / "history.csv"
+    store = HistoryStore(str(path))
+    store.append(["add", 1.0, 2.0, 3.0])
+    assert read_lines(path) == ["Operation,Operand 1,Operand 2,Result", "add,1.0,2.0,3.0"]
+    store.append(["subtract", 5.0, 2.0, 3.0])
+    assert read_lines(path)[-1] == "subtract,5.0,2.0,3.0"  # Appended, not rewritten
+    store.close()
+
+def test_every_n_policy_flushes_in_groups(tmp_path):
+    """Rows are buffered until flush_every rows are pending."""
+    path = tmp_path / "history.csv"
+    store = HistoryStore(str(path), flush_policy="every_n", flush_every=3)
+    store.append(["add", 1.0, 1.0, 2.0])
+    store.append(["add", 2.0, 2.0, 4.0])
+    assert not path.exists() or len(read_lines(path)) <= 1
+    store.append(["add", 3.0, 3.0, 6.0])
+    assert len(read_lines(path)) == 4
+    store.close()
+
+def test_exit_policy_flushes_on_close(tmp_path):
+    """Rows buffered under the exit policy reach the disk on close."""
+    path = tmp_path / "history.csv"
+    store = HistoryStore(str(path), flush_policy="exit", fsync=True)
+    store.append(["multiply", 2.0, 3.0, 6.0])
+    store.close()
+    store.close()  # Closing twice is harmless
+    assert HistoryStore(str(path)).load() == [["multiply", 2.0, 3.0, 6.0]]
+
+def test_rewrite_replaces_file(tmp_path):
+    """Rewrite keeps the header and only the given entries."""
+    path = tmp_path / "history.csv"
+    store = HistoryStore(str(path))
+    store.append(["add", 1.0, 1.0, 2.0])
+    store.rewrite([["divide", 4.0, 2.0, 2.0]])
+    assert store.load() == [["divide", 4.0, 2.0, 2.0]]
+
+def test_invalid_policy():
+    """Unknown flush settings are rejected."""
+    with pytest.raises(ValueError):
+        HistoryStore(flush_policy="sometimes")
+    with pytest.raises(ValueError):
+        HistoryStore(flush_policy="every_n", flush_every=0)
+
+def test_command_handler_appends_through_store(tmp_path):
+    """Calculations are appended once and survive a reload."""
+    path = tmp_path / "history.csv"
+    handler = CommandHandler(HistoryStore(str(path), flush_policy="exit"))
+    handler.register_command("add", AddCommand())
+    handler.execute_command("add", "1", "2")
+    handler.execute_command("add", "1", "2")  # Duplicate is not stored twice
+    handler.close()
+    assert HistoryStore(str(path)).load() == [["add", 1.0, 2.0, 3.0]]
+    handler.save_history()
+    assert len(read_lines(path)) == 2
+
+def test_load_tolerates_old_header_and_bad_rows(tmp_path):
+    """Rows written under the old "Operand1" header still load."""
+    path = tmp_path / "history.csv"
+    path.write_text("Operation,Operand1,Operand2,Result\nadd,1.0,1.0,2.0\nadd,oops\n"
+                    "add,1.0,1.0,2.0\n")
+    store = HistoryStore(str(path))
+    assert store.entries == [["add", 1.0, 1.0, 2.0]]  # Duplicates collapse in memory
+    assert ["add", 1, 1, 2] in store
+
+def test_add_delete_clear(tmp_path):
+    """The store keeps memory and disk in step."""
+    path = tmp_path / "history.csv"
+    store = HistoryStore(str(path))
+    assert store.add(["add", 1.0, 2.0, 3.0])
+    assert not store.add(["add", 1.0, 2.0, 3.0])
+    store.add(["subtract", 3.0, 2.0, 1.0])
+    assert store.delete(0) == ["add", 1.0, 2.0, 3.0]
+    assert list(HistoryStore(str(path))) == [["subtract", 3.0, 2.0, 1.0]]
+    with pytest.raises(IndexError):
+        store.delete(4)
+    store.clear()
+    assert len(store) == 0 and HistoryStore(str(path)).entries == []
+
+def test_iter_rows_pages_and_filters(tmp_path):
+    """Rows stream from disk with 1-based positions, offsets, limits and filters."""
+    store = HistoryStore(str(tmp_path / "history.csv"))
+    for i in range(10):
+        store.add(["add" if i % 2 else "multiply", float(i), 1.0, float(i + 1)])
+    assert [position for position, _ in store.iter_rows(offset=3, limit=2)] == [4, 5]
+    rows = list(store.iter_rows(operation="add", limit=2))
+    assert rows == [(2, ["add", 1.0, 1.0, 2.0]), (4, ["add", 3.0, 1.0, 4.0])]
+
+def test_tail_reads_from_end(tmp_path):
+    """Tail returns the last rows in order, across read blocks."""
+    store = HistoryStore(str(tmp_path / "history.csv"), flush_policy="exit")
+    for i in range(500):
+        store.add(["add", float(i), 0.0, float(i)])
+    assert store.tail(2) == [(499, ["add", 498.0, 0.0, 498.0]), (500, ["add", 499.0, 0.0, 499.0])]
+    assert store.tail(1, operation="divide") == []
+    small_blocks = list(store._reverse_lines(block_size=7))  # pylint: disable=protected-access
+    assert small_blocks[0] == "add,499.0,0.0,499.0" and len(small_blocks) == 501
+    assert store.tail(0) == []
+
+def test_reload_removes_duplicate_rows_on_disk(tmp_path):
+    """Duplicate rows are dropped on disk so positions match memory."""
+    path = tmp_path / "history.csv"
+    path.write_text("Operation,Operand 1,Operand 2,Result\nadd,1.0,1.0,2.0\nadd,1.0,1.0,2.0\nadd,2.0,2.0,4.0\n")
+    store = HistoryStore(str(path))
+    assert list(store.iter_rows()) == [(1, ["add", 1.0, 1.0, 2.0]), (2, ["add", 2.0, 2.0, 4.0])]
+
+def test_delete_records_tombstone_without_rewrite(tmp_path):
+    """Deletes append to the tombstone log and keep other positions stable."""
+    path = tmp_path / "history.csv"
+    store = HistoryStore(str(path))
+    for i in range(4):
+        store.add(["add", float(i), 0.0, float(i)])
+    before = path.read_text()
+    store.delete(1)
+    assert path.read_text() == before  # The CSV itself is untouched
+    assert (tmp_path / "history.csv.deleted").read_text() == "1\n"
+    assert [position for position, _ in store.iter_rows()] == [1, 3, 4]
+    assert [position for position, _ in store.tail(2)] == [3, 4]
+    assert len(store) == 3 and ["add", 1.0, 0.0, 1.0] not in store
+    with pytest.raises(IndexError):
+        store.delete(1)  # Already deleted
+
+    reopened = HistoryStore(str(path))
+    assert reopened.entries[1] is None and len(reopened) == 3
+    reopened.close()  # Compacts on exit
+    assert not (tmp_path / "history.csv.deleted").exists()
+    assert HistoryStore(str(path)).entries == [["add", 0.0, 0.0, 0.0], ["add", 2.0, 0.0, 2.0],
+                                               ["add", 3.0, 0.0, 3.0]]
+
+def test_compaction_threshold(tmp_path):
+    """Reaching the threshold compacts the file immediately."""
+    path = tmp_path / "history.csv"
+    store = HistoryStore(str(path), compact_threshold=2)
+    for i in range(3):
+        store.add(["add", float(i), 0.0, float(i)])
+    store.delete(0)
+    assert store.deleted == {0}
+    store.delete(2)
+    assert store.deleted == set() and store.entries == [["add", 1.0, 0.0, 1.0]]
+    assert store.load() == [["add", 1.0, 0.0, 1.0]]
+    with pytest.raises(ValueError):
+        HistoryStore(str(path), compact_threshold=0)
+
+def test_entries_are_shared_records(tmp_path):
+    """Each entry is one HistoryEntry, kept in both the entries and the duplicate index."""
+    path = tmp_path / "history.csv"
+    HistoryStore(str(path)).add(["add", 1.0, 2.0, 3.0])
+    store = HistoryStore(str(path))
+    entry = store.entries[0]
+    assert isinstance(entry, HistoryEntry)
+    assert entry == ["add", 1.0, 2.0, 3.0] and entry != ["add", 1.0, 2.0, 4.0]
+    assert next(iter(store.index)) is entry
+    assert history_key(["add", "1", "2", "3"]) in store.index  # Plain keys find the record
+    operation, a, b, result = entry
+    assert (operation, a, b, result) == ("add", 1.0, 2.0, 3.0)
+    store.close()
+
+def test_closed_store_is_released(tmp_path, monkeypatch):
+    """close() drops the exit hook, so a closed store is freed; a store written after close is closed again at exit."""
+    store = HistoryStore(str(tmp_path / "history.csv"), flush_policy="exit")
+    store.add(["add", 1.0, 1.0, 2.0])
+    store.close()
+    reference = weakref.ref(store)
+    del store
+    gc.collect()
+    assert reference() is None
+
+    hooks = []
+    monkeypatch.setattr(atexit, "register", hooks.append)
+    monkeypatch.setattr(atexit, "unregister", hooks.remove)
+    store = HistoryStore(str(tmp_path / "history.csv"), flush_policy="exit")
+    store.close()
+    assert hooks == []
+    store.add(["add", 2.0, 2.0, 4.0])
+    assert hooks == [store.close]
+    hooks[0]()  # As at exit
+    assert hooks == [] and len(HistoryStore(str(tmp_path / "history.csv"))) == 2
@@ -0,0 +1,25 @@
+"""Test the queue-based logging mode (its latency is measured in tests/benchmarks/test_logging.py)."""
+import logging
+from app import App, DeferredQueueHandler
+
+def test_queue_mode_installs_listener(monkeypatch, tmp_path):
+    """LOG_MODE=queue routes the configured handlers through a listener thread."""
+    monkeypatch.setenv("HISTORY_FILE", str(tmp_path / "history.csv"))
+    monkeypatch.setenv("LOG_MODE", "queue")
+    App()
+    try:
+        assert App.log_listener is not None
+        assert [type(handler) for handler in logging.getLogger().handlers] == [DeferredQueueHandler]
+        assert [type(handler) for handler in logging.getLogger("app").handlers] == [DeferredQueueHandler]
+    finally:
+        App.stop_log_listener()
+    assert App.log_listener is None
+    assert DeferredQueueHandler not in [type(handler) for handler in logging.getLogger().handlers]
+
+def test_sync_mode_is_default(monkeypatch, tmp_path):
+    """Without LOG_MODE the handlers from logging.conf are used directly."""
+    monkeypatch.setenv("HISTORY_FILE", str(tmp_path / "history.csv"))
+    monkeypatch.delenv("LOG_MODE", raising=False)
+    App()
+    assert App.log_listener is None
+    assert DeferredQueueHandler not in [type(handler) for handler in logging.getLogger().handlers]
@@ -0,0 +1,69 @@
+"""Tests for command metrics and the stats command."""
+import json
+from app.metrics import Histogram, Metrics, MetricsDumper
+from tests.conftest import make_handler
+
+COMMANDS = ("add", "stats")
+
+def test_histogram_percentiles():
+    """Percentiles come from the bucket bounds and never exceed the maximum."""
+    histogram = Histogram()
+    for nanoseconds in [1500] * 90 + [40000] * 10:
+        histogram.observe(nanoseconds)
+    assert histogram.count == 100
+    assert histogram.percentile(0.5) == 2048  # Upper bound of the 1024-2048 ns bucket
+    assert histogram.percentile(0.99) == 40000
+    assert histogram.to_dict()["max_us"] == 40.0
+
+def test_execute_command_records_phases(tmp_path, capsys):
+    """Each phase of an arithmetic command is timed, and errors are counted."""
+    handler = make_handler(tmp_path, COMMANDS, metrics=Metrics(sample_every=1))
+    handler.execute_command("add", "1", "2")
+    handler.execute_command("add", "1", "2")  # Duplicate: no save phase
+    handler.execute_command("add", "x", "2")
+    handler.execute_command("nope")
+    commands = handler.metrics.snapshot()["commands"]
+    assert commands["add"]["count"] == 3
+    assert commands["add"]["errors"] == 1
+    phases = commands["add"]["phases"]
+    assert list(phases) == ["parse", "execute", "dedup", "save", "total"]
+    assert phases["dedup"]["count"] == 2
+    assert phases["save"]["count"] == 1
+    assert commands["unknown"]["errors"] == 1
+    assert "No such command: nope" in capsys.readouterr().out
+
+def test_sampling_counts_every_command(tmp_path):
+    """Only one command in sample_every is timed, but all of them are counted."""
+    handler = make_handler(tmp_path, COMMANDS, metrics=Metrics(sample_every=4))
+    for i in range(8):
+        handler.execute_command("add", str(i), "1")
+    add = handler.metrics.snapshot()["commands"]["add"]
+    assert add["count"] == 8
+    assert add["phases"]["total"]["count"] == 2
+
+def test_disabled_metrics_record_nothing(tmp_path):
+    """With metrics off, commands still run and nothing is counted."""
+    handler = make_handler(tmp_path, COMMANDS, metrics=Metrics(enabled=False))
+    handler.execute_command("add", "1", "2")
+    assert handler.metrics.snapshot()["commands"] == {}
+    assert len(handler.history_store) == 1
+
+def test_stats_command(tmp_path, capsys):
+    """'stats' prints the table and 'stats reset' clears it."""
+    handler = make_handler(tmp_path, COMMANDS, metrics=Metrics(sample_every=1))
+    handler.execute_command("add", "1", "2")
+    capsys.readouterr()
+    handler.execute_command("stats")
+    output = capsys.readouterr().out
+    assert "p95 us" in output
+    assert "add" in output and "save" in output
+    handler.execute_command("stats", "reset")
+    assert "add" not in handler.metrics.snapshot()["commands"]
+
+def test_dumper_writes_final_snapshot(tmp_path):
+    """Stopping the dumper writes the metrics file."""
+    metrics = Metrics()
+    metrics.finish("add", metrics.start())
+    path = tmp_path / "logs" / "metrics.json"
+    MetricsDumper(metrics, str(path), interval=3600).start().stop()
+    assert json.loads(path.read_text())["commands"]["add"]["count"] == 1
@@ -0,0 +1,121 @@
+"""Tests for the float, Decimal and Fraction numeric modes."""
+import decimal
+import gzip
+import io
+from decimal import Decimal
+from fractions import Fraction
+import pytest
+from app import App
+from app.cache import ResultCache
+from app.history_store import HistoryStore
+from app.numeric import NumericMode
+from tests.conftest import make_handler
+
+@pytest.fixture(autouse=True)
+def restore_decimal_context():
+    """App.activate installs a Decimal context; put the test runner's back afterwards."""
+    context = decimal.getcontext()
+    yield
+    decimal.setcontext(context)
+
+COMMANDS = ("add", "divide", "expr")
+
+def test_float_mode_parses_with_the_builtin():
+    """The default mode keeps the float fast path."""
+    assert NumericMode().parse is float
+
+def test_decimal_mode_is_exact_end_to_end(tmp_path, capsys):
+    """Decimal operands are parsed, computed, shown and stored without float rounding."""
+    handler = make_handler(tmp_path, COMMANDS, numeric="decimal")
+    handler.execute_command("add", "0.1", "0.2")
+    handler.execute_command("divide", "1", "3")
+    assert capsys.readouterr().out.splitlines() == ["0.1 + 0.2 = 0.3", "1 / 3 = 0.3333333333"]
+    handler.close()
+    reloaded = HistoryStore(handler.history_store.path, number=Decimal)
+    assert reloaded.load()[0] == ["add", Decimal("0.1"), Decimal("0.2"), Decimal("0.3")]
+    assert "add,0.1,0.2,0.3" in open(handler.history_store.path).read()
+
+def test_decimal_exponents_are_kept_apart(tmp_path, capsys):
+    """Equal Decimals written differently are separate calculations for the cache and the history."""
+    handler = make_handler(tmp_path, COMMANDS, numeric="decimal")
+    handler.result_cache = ResultCache()
+    handler.execute_command("add", "1.00", "1.00")
+    handler.execute_command("add", "1.0", "1.0")
+    handler.execute_command("add", "1.0", "1.0")
+    assert capsys.readouterr().out.splitlines() == ["1.00 + 1.00 = 2.00", "1.0 + 1.0 = 2.0", "1.0 + 1.0 = 2.0"]
+    store = handler.history_store
+    assert [str(entry[3]) for entry in store] == ["2.00", "2.0"]
+    assert ["add", Decimal("1.0"), Decimal("1.0"), Decimal("2.0")] in store
+    store.delete(1)
+    assert ["add", Decimal("1.0"), Decimal("1.0"), Decimal("2.0")] not in store
+    assert ["add", Decimal("1.00"), Decimal("1.00"), Decimal("2.00")] in store
+    handler.close()
+    assert len(HistoryStore(store.path, number=Decimal)) == 1
+
+def test_fraction_mode_expression(tmp_path, capsys):
+    """Expressions and history rows use exact fractions."""
+    handler = make_handler(tmp_path, COMMANDS, numeric="fraction")
+    handler.execute_command("expr", "1/3", "+", "1/6")
+    assert capsys.readouterr().out.strip() == "1/3 + 1/6 = 1/2"
+    assert handler.history[-1] == ["add", Fraction(1, 3), Fraction(1, 6), Fraction(1, 2)]
+
+def test_invalid_decimal_operand(tmp_path, capsys):
+    """Bad input is reported like any other invalid number."""
+    handler = make_handler(tmp_path, COMMANDS, numeric="decimal")
+    handler.execute_command("add", "1", "one")
+    for value in ("nan", "snan", "-inf", "1e999999999"):
+        handler.execute_command("add", value, "1")  # Not finite, or out of the context's range
+    assert capsys.readouterr().out.splitlines() == ["Enter valid numbers for the operation."] * 5
+    assert len(handler.history_store) == 0
+
+def test_history_is_readable_in_every_mode(tmp_path, capsys):
+    """Rows written in one mode are read, and kept by rewrites, in the others."""
+    handler = make_handler(tmp_path, COMMANDS, numeric="fraction")
+    for a in range(1, 5):
+        handler.execute_command("divide", "1", str(a + 2))  # Results such as 1/3
+    handler.close()
+    path = handler.history_store.path
+    with open(path, "a") as file:
+        file.write("add,one,1,2\n")  # No mode can read this row
+
+    handler = make_handler(tmp_path, COMMANDS, numeric="float")
+    assert handler.history_store.load()[0] == ["divide", 1.0, 3.0, 1 / 3]
+    handler.execute_command("add", "1", "1")
+    handler.history_store.delete(0)  # Compacted on close, rewriting the file from memory
+    handler.close()
+
+    handler = make_handler(tmp_path, COMMANDS, numeric="decimal")
+    assert handler.history_store.load()[0] == ["divide", Decimal(1), Decimal(4), Decimal("0.25")]
+    handler.execute_command("add", "2", "2")
+    handler.history_store.delete(0)
+    handler.close()
+
+    assert open(path).read().splitlines()[1] == "add,one,1,2"
+    assert HistoryStore(path, number=Fraction).load()[-2:] == [["add", 1, 1, 2], ["add", 2, 2, 4]]
+    store = HistoryStore(path, max_rows=1)  # Rotation archives the unreadable row as written
+    assert len(store) == 0
+    assert "add,one,1,2" in gzip.open(store.archive_paths()[0], "rt").read()
+    store.close()
+
+def test_app_reads_numeric_settings(tmp_path, monkeypatch):
+    """NUMERIC_MODE and DECIMAL_PRECISION configure the app; batch results keep the precision."""
+    monkeypatch.setenv("HISTORY_FILE", str(tmp_path / "history.csv"))
+    monkeypatch.setenv("NUMERIC_MODE", "decimal")
+    monkeypatch.setenv("DECIMAL_PRECISION", "5")
+    app = App()
+    output = io.StringIO()
+    app.run_batch(["divide 2 3", "multiply 1.1 1.1"], output, workers=2)  # Runs sequentially
+    assert output.getvalue().splitlines() == ["0.66667", "1.21"]
+
+def test_binary_history_requires_float(tmp_path, monkeypatch):
+    """The binary format only holds float64 values."""
+    monkeypatch.setenv("HISTORY_FORMAT", "binary")
+    monkeypatch.setenv("HISTORY_BINARY_FILE", str(tmp_path / "history.bin"))
+    monkeypatch.setenv("NUMERIC_MODE", "fraction")
+    with pytest.raises(ValueError):
+        App()
+
+def test_unknown_mode():
+    """Only float, decimal and fraction are accepted."""
+    with pytest.raises(ValueError):
+        NumericMode("complex")
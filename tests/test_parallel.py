@@ -0,0 +1,50 @@
+"""Tests for evaluating batch arithmetic on a worker pool."""
+import io
+import pytest
+from app import App
+from app.parallel import ParallelExecutor, evaluate_chunk
+
+OPERATIONS = {
+    "add": ("app.plugins.add", "AddCommand"),
+    "divide": ("app.plugins.divide", "DivideCommand"),
+}
+
+def test_evaluate_chunk_reports_errors_per_row():
+    """Bad rows fail with the same message as the scalar command; the rest still evaluate."""
+    rows = [("add", "1", "2"), ("divide", "1", "0"), ("divide", "6", "3"), ("add", "x", "1")]
+    results = evaluate_chunk(rows, OPERATIONS)
+    assert results[0] == (True, ("add", 1.0, 2.0, 3.0))  # The finished history entry
+    assert results[1] == (False, "Cannot divide by 0!")
+    assert results[2] == (True, ("divide", 6.0, 3.0, 2.0))
+    assert results[3][0] is False
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_executor_preserves_order(backend):
+    """Results come back in input order across chunks."""
+    rows = [("add", str(i), "1") for i in range(25)]
+    with ParallelExecutor(OPERATIONS, workers=2, backend=backend, chunk_size=4) as executor:
+        results = executor.evaluate(rows)
+    assert [entry[3] for _, entry in results] == [float(i + 1) for i in range(25)]
+
+def test_executor_rejects_unknown_backend():
+    """Only the process and thread backends are supported."""
+    with pytest.raises(ValueError):
+        ParallelExecutor(OPERATIONS, backend="gpu")
+
+def test_parallel_batch_matches_sequential(tmp_path, monkeypatch):
+    """A parallel batch writes the same results and history as a sequential one."""
+    lines = ['add 1 2', 'divide 1 0', 'history show', 'multiply 2 3', 'add 1 2 3', 'bogus', 'subtract 5 1']
+    monkeypatch.setenv('PARALLEL_BACKEND', 'thread')
+    monkeypatch.setenv('PARALLEL_CHUNK_SIZE', '2')
+    outputs = []
+    histories = []
+    for workers in (1, 3):
+        monkeypatch.setenv('HISTORY_FILE', str(tmp_path / f'history{workers}.csv'))
+        app = App()
+        output = io.StringIO()
+        assert app.run_batch(lines, output, workers=workers) == 2
+        outputs.append(output.getvalue())
+        histories.append(app.command_handler.history_store.load())
+    assert outputs[0] == outputs[1]
+    assert histories[0] == histories[1]
+    assert histories[1][-1] == ['subtract', 5.0, 1.0, 4.0]
@@ -0,0 +1,92 @@
+"""Tests for running piped REPL input through the dispatch table."""
+import io
+from contextlib import redirect_stdout
+from app import App
+from app.pipeline import Pipeline, iter_commands, iter_lines, stdin_is_pipelined
+
+LINES = ['add 1 2', '', '  multiply   2\t3  ', '# a comment', 'divide 1 0', 'add x 1', 'add 1',
+         'bogus 1 2', 'history show', 'subtract 10 1 2', 'add 1 2', 'exit', 'add 5 5']
+
+def test_iter_lines_joins_lines_split_across_chunks():
+    """Lines are whole regardless of where the chunks end."""
+    stream = io.StringIO("add 1 2\nmultiply 3 4\n\nlast")
+    assert list(iter_lines(stream, read_size=3)) == ["add 1 2", "multiply 3 4", "", "last"]
+
+def test_iter_lines_keeps_characters_split_across_chunks():
+    """A multibyte character cut by a chunk boundary is decoded whole."""
+    stream = io.BytesIO("add 1 2 # é€\nnext ü".encode("utf-8"))
+    for read_size in (1, 2, 12, 13):
+        stream.seek(0)
+        assert list(iter_lines(stream, read_size=read_size)) == ["add 1 2 # é€", "next ü"]
+
+def test_iter_commands_reads_lines_like_the_prompt():
+    """Blank lines are skipped and 'exit' stops; '#' lines are kept as commands."""
+    lines = ["add 1 2", "   ", "# note", "exit", "add 3 4"]
+    assert list(iter_commands(lines)) == [(1, ["add", "1", "2"]), (3, ["#", "note"])]
+
+def test_stdin_is_pipelined(tmp_path):
+    """Regular files count as piped input; streams without a descriptor do not."""
+    path = tmp_path / "commands.txt"
+    path.write_text("add 1 2\n")
+    with open(path) as file:
+        assert stdin_is_pipelined(file)
+    assert not stdin_is_pipelined(io.StringIO("add 1 2\n"))
+
+def test_run_pipe_matches_repl_output(tmp_path, monkeypatch):
+    """Piped input prints what typing the same lines into the REPL would, in order."""
+    outputs = []
+    histories = []
+    counts = []
+    for mode in ("repl", "pipe"):
+        monkeypatch.setenv('HISTORY_FILE', str(tmp_path / f'{mode}.csv'))
+        app = App()
+        output = io.StringIO()
+        if mode == "pipe":
+            assert app.run_pipe(io.StringIO("\n".join(LINES)), output) == 10
+        else:
+            app.load_plugins()
+            with redirect_stdout(output):
+                for line in LINES:  # As App.start reads typed lines
+                    tokens = line.split()
+                    if not tokens:
+                        continue
+                    if tokens[0] == 'exit':
+                        break
+                    app.command_handler.execute_command(tokens[0], *tokens[1:])
+        outputs.append(output.getvalue())
+        histories.append(app.command_handler.history_store.load())
+        counts.append(app.command_handler.metrics.counts)
+    assert outputs[0] == outputs[1]
+    assert "1.0 + 2.0 = 3.0\n" in outputs[1]
+    assert "No such command: bogus\n" in outputs[1]
+    assert "No such command: #\n" in outputs[1]  # Not a comment at the prompt either
+    assert histories[0] == histories[1]
+    assert histories[1][-1] == ['subtract', 9.0, 2.0, 7.0]
+    assert counts[0]["unknown"] == counts[1]["unknown"] == [2, 2]
+
+def test_plugins_are_bound_on_first_use(tmp_path, monkeypatch):
+    """Only the plugins piped commands use are imported."""
+    monkeypatch.setenv('HISTORY_FILE', str(tmp_path / 'history.csv'))
+    app = App()
+    assert app.run_pipe(io.StringIO("add 1 2\nmultiply 2 3\n"), io.StringIO()) == 2
+    commands = app.command_handler.commands
+    assert commands["add"].loaded and commands["multiply"].loaded
+    assert not commands["menu"].loaded and not commands["history"].loaded
+
+def test_pipeline_writes_in_blocks(tmp_path, monkeypatch):
+    """Results are written once per block rather than once per line."""
+    monkeypatch.setenv('HISTORY_FILE', str(tmp_path / 'history.csv'))
+    app = App()
+    app.load_plugins()
+    writes = []
+
+    class Output(io.StringIO):
+        def write(self, text):
+            writes.append(text)
+            return super().write(text)
+
+    pipeline = Pipeline(app.command_handler, Output(), block_lines=4)
+    commands = app.iter_batch_commands(f"add {i} 1" for i in range(10))
+    assert pipeline.run(commands) == 10
+    assert len(writes) == 3
+    assert "".join(writes).splitlines()[-1] == "9.0 + 1.0 = 10.0"
@@ -0,0 +1,71 @@
+"""Test lazy, cached plugin discovery."""
+import os
+import sys
+from app.commands import CommandHandler
+from app.history_store import HistoryStore
+from app.registry import LazyCommand, PluginRegistry
+
+PLUGIN_SOURCE = '''
+from app.commands import Command
+
+class EchoCommand(Command):
+    def __init__(self, command_handler):
+        self.command_handler = command_handler
+
+    def execute(self, *args, **kwargs):
+        return " ".join(args)
+'''
+
+def make_registry(tmp_path, monkeypatch):
+    """Create a throwaway plugin package with a single 'echo' plugin."""
+    package = tmp_path / "fakeplugins"
+    (package / "echo").mkdir(parents=True)
+    (package / "__init__.py").write_text("")
+    (package / "echo" / "__init__.py").write_text(PLUGIN_SOURCE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    for name in ("fakeplugins", "fakeplugins.echo"):
+        monkeypatch.delitem(sys.modules, name, raising=False)
+    return PluginRegistry(str(package), "fakeplugins", str(tmp_path / "plugins.json"))
+
+def test_manifest_records_plugin_commands(tmp_path, monkeypatch):
+    """Discovery records the module, class and constructor needs."""
+    registry = make_registry(tmp_path, monkeypatch)
+    assert registry.manifest() == {
+        "echo": {"module": "fakeplugins.echo", "class": "EchoCommand", "needs_handler": True}}
+    assert os.path.exists(registry.cache_file)
+
+def test_manifest_cache_skips_imports(tmp_path, monkeypatch):
+    """A valid cache is used without importing any plugin."""
+    registry = make_registry(tmp_path, monkeypatch)
+    registry.manifest()
+    monkeypatch.setattr(registry, "discover", lambda signature=None: {})
+    assert "echo" in registry.manifest()
+
+def test_manifest_invalidated_by_mtime(tmp_path, monkeypatch):
+    """Touching a plugin forces rediscovery."""
+    registry = make_registry(tmp_path, monkeypatch)
+    registry.manifest()
+    init_file = tmp_path / "fakeplugins" / "echo" / "__init__.py"
+    stat = init_file.stat()
+    os.utime(init_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    monkeypatch.setattr(registry, "discover", lambda signature=None: {"changed": {}})
+    assert registry.manifest() == {"changed": {}}
+
+def test_registered_commands_load_on_first_use(tmp_path, monkeypatch):
+    """Plugins are only imported when their command first runs."""
+    registry = make_registry(tmp_path, monkeypatch)
+    registry.manifest()
+    sys.modules.pop("fakeplugins.echo", None)
+    handler = CommandHandler(HistoryStore(str(tmp_path / "history.csv")))
+    registry.register(handler)
+    command = handler.commands["echo"]
+    assert isinstance(command, LazyCommand) and not command.loaded
+    assert "fakeplugins.echo" not in sys.modules
+    assert command.execute("hello", "there") == "hello there"
+    assert command.loaded and command.command_handler is handler
+
+def test_lazy_command_delegates_attributes():
+    """Attributes such as evaluate come from the loaded plugin."""
+    command = LazyCommand("app.plugins.add", "AddCommand")
+    assert command.evaluate(2, 3) == 5
+    assert command.pure and not LazyCommand("app.plugins.menu", "MenuCommand").pure
@@ -0,0 +1,63 @@
+"""Tests for serving commands to concurrent socket clients."""
+import asyncio
+from app import App
+from app.server import CommandServer
+
+async def send(reader, writer, line):
+    """Send one command and read its response up to the empty end-of-response line."""
+    writer.write(f"{line}\n".encode())
+    await writer.drain()
+    lines = []
+    while (response := (await reader.readline()).decode().rstrip("\n")) != "":
+        lines.append(response)
+    return lines
+
+def test_concurrent_clients_share_one_history(tmp_path, monkeypatch):
+    """Clients on a Unix socket get their own results and every append is recorded once."""
+    monkeypatch.setenv("HISTORY_FILE", str(tmp_path / "history.csv"))
+    app = App()
+    app.load_plugins()
+    server = app.create_server(path=str(tmp_path / "calculator.sock"))
+
+    async def client(number):
+        reader, writer = await asyncio.open_unix_connection(server.path)
+        responses = [await send(reader, writer, f"add {number} {i}") for i in range(20)]
+        responses.append(await send(reader, writer, "bogus"))
+        writer.write(b"exit\n")
+        await writer.drain()
+        assert await reader.read() == b""  # The server closes the connection
+        writer.close()
+        return responses
+
+    async def scenario():
+        await server.start()
+        try:
+            return await asyncio.gather(*(client(number) for number in range(5)))
+        finally:
+            await server.close()
+
+    results = asyncio.run(scenario())
+    assert results[3][4] == ["3.0 + 4.0 = 7.0"]
+    assert results[0][-1] == ["No such command: bogus"]
+    assert len(app.command_handler.history_store) == 5 * 20
+    assert not (tmp_path / "calculator.sock").exists()
+
+def test_tcp_server_binds_free_port(tmp_path, monkeypatch):
+    """Port 0 binds a free TCP port, and history commands work over the socket."""
+    monkeypatch.setenv("HISTORY_FILE", str(tmp_path / "history.csv"))
+    app = App()
+    app.load_plugins()
+    server = CommandServer(app.command_handler, port=0)
+
+    async def scenario():
+        await server.start()
+        host, port = server.address.split(":")
+        reader, writer = await asyncio.open_connection(host, int(port))
+        await send(reader, writer, "multiply 2 3")
+        lines = await send(reader, writer, "history show")
+        writer.close()
+        await server.close()
+        return lines
+
+    lines = asyncio.run(scenario())
+    assert any("multiply" in line for line in lines)
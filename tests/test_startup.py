@@ -0,0 +1,63 @@
+"""Test the start-up profile (--profile-startup) and the cold start-up budget."""
+import os
+import subprocess
+import sys
+import pytest
+from app import App
+from app.profiling import StartupProfile
+from main import main
+from tests.conftest import COLD_START
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+def test_profile_times_each_phase():
+    """Phases are kept in order and the report ends with their total."""
+    profile = StartupProfile()
+    profile.record("import app", 0.03)
+    with profile.phase("history"):
+        pass
+    assert [name for name, _ in profile.phases] == ["import app", "history"]
+    report = profile.report()
+    assert report[0].split() == ["Phase", "ms", "%"]
+    assert report[1].split()[2] == "30.0"
+    assert report[-1].split()[0] == "total"
+    with pytest.raises(ValueError):
+        profile.dump()
+
+def test_app_phases_and_plugin_imports(app_environment):
+    """App records its start-up phases, and import_plugins times each deferred plugin."""
+    profile = StartupProfile()
+    app = App(profile)
+    app.load_plugins()
+    app.import_plugins()
+    names = [name for name, _ in profile.phases]
+    assert names[:6] == ["env", "logging", "numeric", "history", "handler", "plugins"]
+    assert {"plugin add", "plugin history", "plugin menu"} <= set(names)
+    assert all(command.loaded for command in app.command_handler.commands.values())
+    app.import_plugins()  # Nothing left to import
+    assert len(profile.phases) == len(names)
+    app.shutdown()
+
+def test_main_profile_startup(app_environment, tmp_path, capsys):
+    """--profile-startup prints the breakdown; --profile-dump also writes pstats data."""
+    dump = tmp_path / "startup.prof"
+    assert main(["--profile-startup", "--profile-dump", str(dump)]) == 0
+    out = capsys.readouterr().out.splitlines()
+    assert out[1].split()[:2] == ["import", "app"]
+    assert any(line.startswith("plugin divide") for line in out)
+    assert out[-1] == f"cProfile statistics written to {dump}"
+    assert dump.stat().st_size > 0
+
+def test_cold_start_within_budget(app_environment, startup_budget):
+    """Importing the app, App() and load_plugins() in a new process stays within --startup_budget."""
+    def run():
+        return float(subprocess.run([sys.executable, "-c", COLD_START], capture_output=True, text=True,
+                                    check=True, env=os.environ.copy()).stdout)
+
+    run()  # Writes the plugin manifest, as after the first start
+    best = min(run() for _ in range(3))
+    if best > startup_budget:
+        profile = subprocess.run([sys.executable, MAIN, "--profile-startup"], capture_output=True,
+                                 text=True, env=os.environ.copy()).stdout
+        pytest.fail(f"Cold start took {best * 1000:.0f} ms, over the {startup_budget * 1000:.0f} ms "
+                    f"budget:\n{profile}")